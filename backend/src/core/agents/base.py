@@ -1,7 +1,20 @@
 class BaseAgent:
+    # MessageKind -> handler(self, message). Subclasses fill this in after
+    # defining their handlers; a handler may be sync or a coroutine function.
+    handlers = {}
+
     def __init__(self, agent_id, sim):
         self.agent_id = agent_id
         self.sim = sim
 
+    def dispatch(self, message):
+        """Run the handler for message.kind; returns its coroutine if it is async."""
+        handler = self.handlers.get(message.kind)
+        if handler is not None:
+            return handler(self, message)
+        # No handler: not addressed to this kind of agent, ignore like before
+
     async def handle_message(self, message):
-        raise NotImplementedError
\ No newline at end of file
+        result = self.dispatch(message)
+        if result is not None:
+            await result
@@ -10,21 +10,10 @@ class ByzantineServiceNode(ServiceNode):
         super().__init__(agent_id, sim, cache, network, db)
         self.malicious_prob = malicious_prob
 
-    def handle_read(self, payload, requester):
+    async def handle_read(self, request, requester):
         if random.random() < self.malicious_prob:
             # Act maliciously: Return wrong data
-            from messages.message import Message
-            response = Message(
-                src=self, 
-                dst=requester, 
-                payload={
-                    "type": "READ_RESPONSE", 
-                    "key": payload["key"], 
-                    "value": "CORRUPTED_DATA_BYZANTINE", 
-                    "version": -1
-                }
-            )
-            self.network.send(response)
+            self.reply(requester, request.key, "CORRUPTED_DATA_BYZANTINE", -1, request.req_id, request.attempt)
         else:
             # Act normally
-            super().handle_read(payload, requester)
+            await super().handle_read(request, requester)
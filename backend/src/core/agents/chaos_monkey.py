@@ -1,31 +1,87 @@
 from agents.base import BaseAgent
+from agents.service_node import ServiceNode
 import random
 
 class ChaosMonkeyAgent(BaseAgent):
     """
     An agent that randomly 'kills' other agents to test system self-healing.
+
+    By default it attacks every 50-200 time units and kills a random target
+    with kill_prob, permanently. Passing mttf switches to a per-target failure
+    process (exponential time-to-failure with that mean), and passing mttr
+    restarts killed targets after an exponential repair time, warming their
+    cache with the given warm-up strategy (see ServiceNode.restart).
     """
-    def __init__(self, agent_id, sim, targets, kill_prob=0.05):
+    def __init__(self, agent_id, sim, targets, kill_prob=0.05, network=None,
+                 mttf=None, mttr=None, warmup="cold", warmup_k=5):
         super().__init__(agent_id, sim)
+        # Checked up front: a bad strategy would otherwise only raise inside a
+        # restart event, leaving that node (and its failure loop) dead for good
+        if warmup not in ServiceNode.WARMUP_STRATEGIES:
+            raise ValueError(f"Unknown warm-up strategy '{warmup}', expected one of {ServiceNode.WARMUP_STRATEGIES}")
         self.targets = targets
         self.kill_prob = kill_prob
-        self.schedule_next_attack()
+        self.network = network  # Used to drop messages still in flight to killed nodes
+        self.mttf = mttf
+        self.mttr = mttr
+        self.warmup = warmup
+        self.warmup_k = warmup_k
+        self._next_attack = None
+        self._timers = {}  # target agent_id -> pending failure/restart event
+        if mttf:
+            for target in targets:
+                self.schedule_failure(target)
+        else:
+            self.schedule_next_attack()
 
     def schedule_next_attack(self):
         # Schedule next attack at a random interval
         interval = random.uniform(50, 200)
         from engine.event import Event
         event = Event(time=self.sim.time + interval, callback=self.attack)
-        self.sim.event_queue.push(event)
+        self._next_attack = self.sim.event_queue.push(event)
+
+    def schedule_failure(self, target):
+        from engine.event import Event
+        event = Event(time=self.sim.time + random.expovariate(1 / self.mttf), callback=lambda: self.kill(target))
+        self._timers[target.agent_id] = self.sim.event_queue.push(event)
+
+    def schedule_restart(self, target):
+        from engine.event import Event
+        event = Event(time=self.sim.time + random.expovariate(1 / self.mttr), callback=lambda: self.restart(target))
+        self._timers[target.agent_id] = self.sim.event_queue.push(event)
 
-    def attack(self):
+    def stop(self):
+        """Cancel pending attacks, failures and restarts so nothing outlives the run."""
+        if self._next_attack:
+            self._next_attack.cancel()
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers = {}
+
+    async def attack(self):
         # Use self.targets (not self.nodes)
-        if self.targets and random.random() < self.kill_prob:
-            target = random.choice(self.targets)
-            target.active = False
-            print(f"[ChaosMonkey] Killed node {target.agent_id}")
-        
+        alive = [target for target in self.targets if getattr(target, "active", True)]
+        if alive and random.random() < self.kill_prob:
+            await self.kill(random.choice(alive))
+
         self.schedule_next_attack()
 
+    async def kill(self, target):
+        if hasattr(target, "fail"):
+            await target.fail()
+        else:
+            target.active = False
+        dropped = self.network.cancel_in_flight(target) if self.network else 0
+        print(f"[ChaosMonkey] Killed node {target.agent_id} (dropped {dropped} in-flight messages)")
+        if self.mttr:
+            self.schedule_restart(target)
+
+    async def restart(self, target):
+        await target.restart(warmup=self.warmup, k=self.warmup_k)
+        print(f"[ChaosMonkey] Restarted node {target.agent_id} (warm-up: {self.warmup})")
+        if self.mttf:
+            self.schedule_failure(target)
+
     async def handle_message(self, message):
         pass
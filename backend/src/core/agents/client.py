@@ -1,27 +1,43 @@
+import itertools
 import random
 from agents.base import BaseAgent
-from messages.message import Message
+from messages.message import MessageKind
+from messages.read_write import ReadMessage, WriteMessage
 
 class Client(BaseAgent):
-    def __init__(self, agent_id, sim, network, service_node, max_time=None):
+    def __init__(self, agent_id, sim, network, service_node, max_time=None, key_space=10, skew=0.0, rate=None,
+                 db=None, write_fraction=0.0):
         super().__init__(agent_id, sim)
         self.network = network
         self.service_node = service_node
         self.max_time = max_time  # Stop generating reads after this time
+        self.key_space = key_space
+        self.rate = rate  # Reads per time unit as one Poisson stream; None keeps the default pacing
+        # Zipf-like popularity: key_i is read with weight 1 / i**skew (0 = uniform)
+        self._key_weights = list(itertools.accumulate(1 / i ** skew for i in range(1, key_space + 1))) if skew else None
+        self._timers = []  # Handles of pending read timers
+        # Share of generated requests sent to the DB as writes (which drive invalidation)
+        self.db = db
+        self.write_fraction = write_fraction if db else 0.0
+        self.stats = {"reads": 0, "writes": 0, "responses": 0, "stale_reads": 0}
         # Schedule first read immediately or very soon
         self.schedule_immediate_read()
-        self.schedule_next_read()
+        if not rate:
+            self.schedule_next_read()
     
     def schedule_immediate_read(self):
         """Schedule first read immediately to kickstart the simulation"""
         from engine.event import Event
         # Use generate_random_read which handles the full flow
         event = Event(time=self.sim.time + 0.1, callback=self.generate_random_read)
-        self.sim.event_queue.push(event)
+        self._add_timer(self.sim.event_queue.push(event))
 
     def schedule_next_read(self):
         # Schedule the next read event at a random interval (shorter for more activity)
-        interval = random.uniform(5, 25)  # Reduced from 10-50 to generate more events
+        if self.rate:
+            interval = random.expovariate(self.rate)
+        else:
+            interval = random.uniform(5, 25)  # Reduced from 10-50 to generate more events
         next_time = self.sim.time + interval
         
         # Don't schedule if we've exceeded max_time
@@ -30,23 +46,52 @@ class Client(BaseAgent):
             
         from engine.event import Event
         event = Event(time=next_time, callback=self.generate_random_read)
-        self.sim.event_queue.push(event)
+        self._add_timer(self.sim.event_queue.push(event))
+
+    def _add_timer(self, event):
+        self._timers = [timer for timer in self._timers if timer.pending]
+        self._timers.append(event)
+
+    def stop(self):
+        """Cancel pending read timers, e.g. when the run is stopped early."""
+        for timer in self._timers:
+            timer.cancel()
+        self._timers = []
 
     def generate_random_read(self):
         # Don't generate if we've exceeded max_time
         if self.max_time and self.sim.time > self.max_time:
             return
             
-        key = f"key_{random.randint(1, 10)}" # Small set of keys for hits
-        print(f"[Client] Generating read request for {key} at time {self.sim.time:.2f}")
-        self.send_read(key)
+        if self._key_weights:
+            rank = random.choices(range(1, self.key_space + 1), cum_weights=self._key_weights)[0]
+        else:
+            rank = random.randint(1, self.key_space)  # Small set of keys for hits
+        key = f"key_{rank}"
+        if self.write_fraction and random.random() < self.write_fraction:
+            print(f"[Client] Generating write request for {key} at time {self.sim.time:.2f}")
+            self.send_write(key)
+        else:
+            print(f"[Client] Generating read request for {key} at time {self.sim.time:.2f}")
+            self.send_read(key)
         self.schedule_next_read()
 
     def send_read(self, key):
         # Support both single node and list/load balancer
         target = self.service_node[0] if isinstance(self.service_node, list) else self.service_node
-        message = Message(src=self, dst=target, payload={"type": "READ", "key": key})
-        self.network.send(message)
+        self.network.send(ReadMessage(self, target, key))
+        self.stats["reads"] += 1
+
+    def send_write(self, key):
+        self.stats["writes"] += 1
+        self.network.send(WriteMessage(self, self.db, key, f"{key}_v{self.stats['writes']}"))
+
+    def on_read_response(self, message):
+        self.stats["responses"] += 1
+        # Stale: the DB already held a newer version when the answer arrived
+        if self.db and message.key in self.db.data and message.version < self.db.data[message.key][1]:
+            self.stats["stale_reads"] += 1
 
-    async def handle_message(self, message):
-        pass # Client just prints or logs, handled by observer
\ No newline at end of file
+    handlers = {
+        MessageKind.READ_RESPONSE: on_read_response,
+    }
\ No newline at end of file
@@ -1,28 +1,71 @@
 from agents.base import BaseAgent
-from messages.message import Message
+from messages.message import MessageKind
+from messages.read_write import ReadResponseMessage, ReadRejectedMessage
+from messages.invalidate import InvalidateMessage
+from messages.cache_transfer import PrefetchResponseMessage
 
 class Database(BaseAgent):
-    def __init__(self, agent_id, sim, network):
+    def __init__(self, agent_id, sim, network, service=None):
         super().__init__(agent_id, sim)
         self.network = network
+        self.service = service  # ServiceQueue for all requests; None answers instantly
         self.data = {}
         self.version_counter = 0
         self.service_nodes = []
+        self.l2_shards = []  # Shared L2 tier, invalidated alongside the service nodes
+        self.reads = 0  # Keys read, including warm-up prefetches
+        self.read_counts = {}  # key -> reads, to find hot keys for prefetching
+
+    def seed(self, key_space, version=1):
+        """
+        Load key_1..key_<key_space> at the given version. Writes continue the
+        version counter from there, so every version of a key is unique and
+        caches can order them.
+        """
+        for i in range(1, key_space + 1):
+            self.data[f"key_{i}"] = (f"value_{i}", version)
+        self.version_counter = max(self.version_counter, version)
 
     async def handle_message(self, message):
-        payload = message.payload
-        if payload["type"] == "WRITE":
-            key = payload["key"]
-            value = payload["value"]
-            self.version_counter += 1
-            self.data[key] = (value, self.version_counter)
-            # Send invalidate to all service nodes
-            for node in self.service_nodes:
-                invalidate_msg = Message(src=self, dst=node, payload={"type": "INVALIDATE", "key": key, "version": self.version_counter})
-                self.network.send(invalidate_msg)
-        elif payload["type"] == "READ_DB":
-            key = payload["key"]
-            if key in self.data:
-                value, version = self.data[key]
-                response = Message(src=self, dst=message.src, payload={"type": "READ_RESPONSE", "key": key, "value": value, "version": version})
-                self.network.send(response)
\ No newline at end of file
+        if self.service is None:
+            await BaseAgent.handle_message(self, message)
+            return
+        # Writes are never shed: dropping one would lose data and skip its invalidations
+        sheddable = message.kind != MessageKind.WRITE
+        if not self.service.submit(lambda: BaseAgent.handle_message(self, message), sheddable=sheddable):
+            # Shed: tell the sender so it can fail fast instead of waiting
+            if message.kind == MessageKind.READ_DB:
+                self.network.send(ReadRejectedMessage(self, message.src, message.key))
+            elif message.kind == MessageKind.PREFETCH:
+                self.network.send(PrefetchResponseMessage(self, message.src, [], shed=True))
+
+    def on_write(self, message):
+        key = message.key
+        self.version_counter += 1
+        self.data[key] = (message.value, self.version_counter)
+        # Send invalidate to all service nodes and L2 shards
+        for node in self.service_nodes + self.l2_shards:
+            self.network.send(InvalidateMessage(self, node, key, self.version_counter))
+
+    def on_read_db(self, message):
+        key = message.key
+        self.reads += 1
+        self.read_counts[key] = self.read_counts.get(key, 0) + 1
+        if key in self.data:
+            value, version = self.data[key]
+            self.network.send(ReadResponseMessage(self, message.src, key, value, version))
+
+    def on_prefetch(self, message):
+        # Warm-up for a restarted node: its k most read keys, hottest first
+        hot = sorted(self.read_counts, key=self.read_counts.get, reverse=True)
+        if message.index is not None:
+            hot = [key for key in hot if hash(key) % message.ring_size == message.index]
+        entries = [(key, *self.data[key], None) for key in hot if key in self.data][:message.k]
+        self.reads += len(entries)
+        self.network.send(PrefetchResponseMessage(self, message.src, entries))
+
+    handlers = {
+        MessageKind.WRITE: on_write,
+        MessageKind.READ_DB: on_read_db,
+        MessageKind.PREFETCH: on_prefetch,
+    }
@@ -0,0 +1,115 @@
+from agents.base import BaseAgent
+from cache.cache_entry import CacheEntry
+from messages.message import MessageKind
+from messages.read_write import ReadResponseMessage, ReadRejectedMessage, ReadDbMessage
+from messages.invalidate import InvalidateMessage
+
+class L2CacheAgent(BaseAgent):
+    """
+    One shard of a shared second-level cache between the ServiceNodes and the
+    Database. ServiceNode misses come here (READ_L2) and an L2 miss reads
+    through to the DB.
+
+    Policies:
+      - "non_inclusive": the shard keeps a copy of everything it fetched from
+        the DB, so hot keys usually live in both tiers. L2 evictions do not
+        back-invalidate the L1s, so L1 contents are not a subset of L2.
+      - "inclusive": as non_inclusive, but evicting a key from L2 sends an
+        INVALIDATE for it to every L1, so L1 contents stay a subset of L2.
+        L1 hits send an L2_TOUCH so keys that are hot in L1 are not the
+        ones L2 evicts.
+      - "exclusive": the shard only holds entries evicted from an L1 (a victim
+        cache); a hit moves the entry up into the requesting L1 and out of L2
+    """
+    CACHE_TTL = 500
+    POLICIES = ("non_inclusive", "inclusive", "exclusive")
+
+    def __init__(self, agent_id, sim, cache, network, db, policy="non_inclusive", observer=None):
+        super().__init__(agent_id, sim)
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown L2 policy '{policy}', expected one of {self.POLICIES}")
+        self.cache = cache
+        self.network = network
+        self.db = db
+        self.policy = policy
+        self.observer = observer
+        self.service_nodes = []  # L1s to back-invalidate on eviction (inclusive policy)
+        self.pending_requests = {}  # key -> [L1 nodes] waiting on the DB
+        self.invalidated = {}  # key -> version of the last INVALIDATE; older puts are stale
+        self.stats = {"hits": 0, "misses": 0, "demotions": 0, "stale_puts": 0, "back_invalidations": 0}
+
+    async def on_read_l2(self, message):
+        await self.handle_read(message.key, message.src)
+
+    def on_read_response(self, message):
+        # Response from DB
+        key = message.key
+        if self.policy != "exclusive" and not self.is_stale(key, message.version):
+            self.fill(key, CacheEntry(key, message.value, message.version, self.CACHE_TTL, self.sim.time))
+        for requester in self.pending_requests.pop(key, []):
+            self.reply(requester, key, message.value, message.version)
+
+    def on_read_rejected(self, message):
+        # DB shed the read-through; pass the rejection down
+        for requester in self.pending_requests.pop(message.key, []):
+            self.network.send(ReadRejectedMessage(self, requester, message.key))
+
+    def on_l2_put(self, message):
+        # Entry evicted from an L1 (exclusive policy)
+        key = message.key
+        if self.is_stale(key, message.version):
+            # Demoted before a write but delivered after its INVALIDATE
+            self.stats["stale_puts"] += 1
+            return
+        ttl = message.expiry - self.sim.time
+        if ttl > 0:
+            self.cache.put(key, CacheEntry(key, message.value, message.version, ttl, self.sim.time))
+            self.stats["demotions"] += 1
+
+    def on_l2_touch(self, message):
+        # L1 hit (inclusive policy): refresh the key's recency without a read
+        self.cache.get(message.key)
+
+    def on_invalidate(self, message):
+        self.cache.store.pop(message.key, None)
+        self.invalidated[message.key] = max(message.version, self.invalidated.get(message.key, 0))
+
+    def is_stale(self, key, version):
+        return version < self.invalidated.get(key, 0)
+
+    handlers = {
+        MessageKind.READ_L2: on_read_l2,
+        MessageKind.READ_RESPONSE: on_read_response,
+        MessageKind.READ_REJECTED: on_read_rejected,
+        MessageKind.L2_PUT: on_l2_put,
+        MessageKind.INVALIDATE: on_invalidate,
+        MessageKind.L2_TOUCH: on_l2_touch,
+    }
+
+    async def handle_read(self, key, requester):
+        entry = self.cache.get(key)
+        if entry and entry.expiry > self.sim.time:
+            self.stats["hits"] += 1
+            if self.observer:
+                await self.observer.report_event("L2_HIT", {"shard": self.agent_id, "key": key})
+            if self.policy == "exclusive":
+                self.cache.store.pop(key, None)  # Moves up into the L1
+            self.reply(requester, key, entry.value, entry.version, entry.expiry)
+        else:
+            self.stats["misses"] += 1
+            if self.observer:
+                await self.observer.report_event("L2_MISS", {"shard": self.agent_id, "key": key})
+            self.pending_requests.setdefault(key, []).append(requester)
+            self.network.send(ReadDbMessage(self, self.db, key))
+
+    def fill(self, key, entry):
+        evicted = self.cache.put(key, entry)
+        if evicted and self.policy == "inclusive":
+            # Inclusive hierarchy: an L2 victim may not stay behind in any L1
+            victim_key, victim = evicted
+            for node in self.service_nodes:
+                self.network.send(InvalidateMessage(self, node, victim_key, victim.version))
+            self.stats["back_invalidations"] += 1
+
+    def reply(self, requester, key, value, version, expiry=None):
+        self.network.send(ReadResponseMessage(self, requester, key, value, version, expiry=expiry))
@@ -1,35 +1,265 @@
+import itertools
+import math
+import random
+from collections import Counter, deque
 from agents.base import BaseAgent
-from messages.message import Message
+from engine.event import Event
+from messages.message import MessageKind
+from messages.read_write import ReadMessage, ReadResponseMessage
+
+
+def nearest_rank(p, n):
+    """1-based nearest rank of the p-th percentile among n samples."""
+    # round() first so float noise (99.9 / 100 * 1000 = 999.0000000000001) can't bump the rank
+    return max(1, math.ceil(round(p / 100 * n, 9)))
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    return values[nearest_rank(p, len(values)) - 1]
+
+
+def histogram_percentile(buckets, total, p):
+    """Nearest-rank percentile of a sorted [(value, count)] histogram holding total samples."""
+    if not total:
+        return 0.0
+    rank = nearest_rank(p, total)
+    seen = 0
+    for value, count in buckets:
+        seen += count
+        if seen >= rank:
+            return value
+    return buckets[-1][0]
+
 
 class LoadBalancerAgent(BaseAgent):
     """
     An agent that distributes requests across multiple cache nodes.
     Uses consistent hashing so same keys always go to same node (enables cache hits).
+
+    Every READ is tracked until a node answers, and the response is relayed
+    back to the client. That lets the LB:
+      - retry a request on the next replica when it times out
+      - optionally hedge: if no answer arrives within the hedge_percentile of
+        recent response times, send a copy to a backup replica, keep the
+        first response and cancel the rest
+
+    The outstanding count per node also drives the load-aware policies, which
+    all start from the key's affinity node so caches stay effective:
+      - "affinity": always the first live node on the key's ring
+      - "least_outstanding": the least loaded of the key's first `replicas` live nodes
+      - "p2c": power of two choices between the affinity node and one other
+        random live node
     """
-    def __init__(self, agent_id, sim, nodes, network):
+    POLICIES = ("affinity", "least_outstanding", "p2c")
+    MIN_HEDGE_SAMPLES = 20  # Responses needed before the percentile replaces the default delay
+    HEDGE_REFRESH = 50  # Recompute the hedge delay every this many responses
+    LATENCY_RESOLUTION = 2  # Decimal places kept in the whole-run latency histogram
+
+    def __init__(self, agent_id, sim, nodes, network, observer=None, hedging=False,
+                 hedge_percentile=95, hedge_delay=10.0, timeout=50.0, max_retries=1,
+                 latency_window=1000, policy="affinity", replicas=2):
         super().__init__(agent_id, sim)
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown balancing policy '{policy}', expected one of {self.POLICIES}")
+        if replicas < 1:
+            raise ValueError(f"replicas must be at least 1, got {replicas}")
         self.nodes = nodes
         self.network = network
+        self.observer = observer
+        self.policy = policy
+        self.replicas = replicas
+        self.node_load = {node.agent_id: 0 for node in nodes}  # Requests outstanding per node
+        self.hedging = hedging
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay = hedge_delay  # Used until enough responses have been seen
+        self._percentile_delay = hedge_delay
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.outstanding = {}  # req_id -> state of a request still waiting for a node
+        self.recent_latencies = deque(maxlen=latency_window)
+        # Whole-run latency histogram (rounded to LATENCY_RESOLUTION): memory is bounded
+        # by the latency range, not the request count
+        self.latency_counts = Counter()
+        self.stats = {
+            "requests": 0,
+            "completed": 0,
+            "backend_requests": 0,  # READs sent to nodes, hedges and retries included
+            "hedged": 0,
+            "hedge_wins": 0,
+            "retries": 0,
+            "timeouts": 0,
+            "rejected": 0,  # Shed by every node tried
+            "late_responses": 0,
+        }
+        self._req_ids = itertools.count()
+
+    def on_read(self, message):
+        self.start_request(message.src, message.key)
+
+    def candidates(self, key, exclude=()):
+        # Consistent hashing: same key always starts at the same node
+        key_hash = hash(key) % len(self.nodes)
+
+        # Skip dead (and already tried) nodes, in ring order
+        ring = (self.nodes[(key_hash + i) % len(self.nodes)] for i in range(len(self.nodes)))
+        return [node for node in ring if getattr(node, 'active', True) and node not in exclude]
+
+    def pick_node(self, key, exclude=()):
+        nodes = self.candidates(key, exclude)
+        if not nodes:
+            return None
+        if self.policy == "least_outstanding":
+            # min() keeps the first (affinity) node on ties
+            return min(nodes[:self.replicas], key=lambda node: self.node_load[node.agent_id])
+        if self.policy == "p2c" and len(nodes) > 1:
+            first, second = nodes[0], random.choice(nodes[1:])
+            return second if self.node_load[second.agent_id] < self.node_load[first.agent_id] else first
+        return nodes[0]
+
+    def start_request(self, client, key):
+        req_id = next(self._req_ids)
+        request = {
+            "client": client,
+            "key": key,
+            "start": self.sim.time,
+            "targets": [],
+            "sends": [],
+            "timers": [],
+            "attempt": 0,
+            "hedged": False,
+            "loaded": [],  # Targets counted in node_load for this request
+            "rejections": 0,
+        }
+        self.outstanding[req_id] = request
+        self.stats["requests"] += 1
+
+        # All nodes dead, pick any
+        target = self.pick_node(key) or self.nodes[hash(key) % len(self.nodes)]
+        self._forward(req_id, request, target)
+        self._arm_timers(req_id, request)
+
+    def _forward(self, req_id, request, target):
+        request["targets"].append(target)
+        request["loaded"].append(target)
+        self.node_load[target.agent_id] += 1
+        handle = self.network.send(ReadMessage(self, target, request["key"], req_id, request["attempt"]))
+        if handle:
+            request["sends"].append(handle)
+        self.stats["backend_requests"] += 1
+
+    def _arm_timers(self, req_id, request):
+        now = self.sim.time
+        timers = [Event(time=now + self.timeout, callback=lambda: self._on_timeout(req_id))]
+        if self.hedging and not request["hedged"]:
+            timers.append(Event(time=now + self.current_hedge_delay(), callback=lambda: self._on_hedge(req_id)))
+        request["timers"] = [self.sim.event_queue.push(timer) for timer in timers]
+
+    def current_hedge_delay(self):
+        if len(self.recent_latencies) < self.MIN_HEDGE_SAMPLES:
+            return self.hedge_delay
+        return self._percentile_delay
+
+    def _on_hedge(self, req_id):
+        request = self.outstanding.get(req_id)
+        if not request:
+            return
+        backup = self.pick_node(request["key"], exclude=request["targets"])
+        if backup:
+            request["hedged"] = True
+            self.stats["hedged"] += 1
+            self._forward(req_id, request, backup)
+
+    async def _on_timeout(self, req_id):
+        request = self.outstanding.get(req_id)
+        if request:
+            await self._retry_or_fail(req_id, request, "timeouts")
+
+    async def handle_rejection(self, message):
+        req_id = message.req_id
+        request = self.outstanding.get(req_id)
+        if not request or message.attempt != request["attempt"]:
+            return  # Done, or a late rejection from an earlier attempt (maybe by the same node)
+        request["rejections"] += 1
+        if request["rejections"] < len(request["loaded"]):
+            return  # A hedged copy may still be answered
+        await self._retry_or_fail(req_id, request, "rejected")
+
+    async def _retry_or_fail(self, req_id, request, outcome):
+        self._cancel(request)
+        request["rejections"] = 0
+        if request["attempt"] < self.max_retries:
+            request["attempt"] += 1
+            self.stats["retries"] += 1
+            # Prefer a replica we have not tried; the message may just have been lost
+            target = self.pick_node(request["key"], exclude=request["targets"]) or self.pick_node(request["key"])
+            if target:
+                self._forward(req_id, request, target)
+                self._arm_timers(req_id, request)
+                return
+        del self.outstanding[req_id]
+        self.stats[outcome] += 1
+        if self.observer and outcome == "timeouts":
+            await self.observer.report_event("READ_TIMEOUT", {"key": request["key"], "lb": self.agent_id})
+
+    async def complete_request(self, message):
+        request = self.outstanding.pop(message.req_id, None)
+        if request is None:
+            # Loser of a hedge, or answered after the request timed out
+            self.stats["late_responses"] += 1
+            return
+        self._cancel(request)
+
+        latency = self.sim.time - request["start"]
+        self.latency_counts[round(latency, self.LATENCY_RESOLUTION)] += 1
+        self.recent_latencies.append(latency)
+        self.stats["completed"] += 1
+        if self.stats["completed"] % self.HEDGE_REFRESH == 0 or len(self.recent_latencies) == self.MIN_HEDGE_SAMPLES:
+            self._percentile_delay = percentile(sorted(self.recent_latencies), self.hedge_percentile)
+        if request["hedged"] and message.src is not request["targets"][0]:
+            self.stats["hedge_wins"] += 1
+
+        self.network.send(ReadResponseMessage(self, request["client"], message.key, message.value, message.version))
+
+    def _cancel(self, request):
+        # Drop pending timers and any copies of the request not yet delivered
+        for handle in request["timers"] + request["sends"]:
+            handle.cancel()
+        request["timers"] = []
+        request["sends"] = []
+        for target in request["loaded"]:
+            self.node_load[target.agent_id] -= 1
+        request["loaded"] = []
 
-    async def handle_message(self, message):
-        payload = message.payload
-        if payload["type"] == "READ":
-            # Consistent hashing: same key always goes to same node
-            key = payload.get("key", "")
-            key_hash = hash(key) % len(self.nodes)
-            
-            # Skip dead nodes - find next available
-            attempts = 0
-            while attempts < len(self.nodes):
-                target = self.nodes[(key_hash + attempts) % len(self.nodes)]
-                if getattr(target, 'active', True):
-                    break
-                attempts += 1
-            else:
-                # All nodes dead, pick any
-                target = self.nodes[key_hash % len(self.nodes)]
-            
-            # Forward the message
-            forwarded = Message(src=message.src, dst=target, payload=payload)
-            self.network.send(forwarded)
+    def report(self, window=False):
+        """
+        Latency percentiles and the extra backend load hedging/retries cost.
+        Percentiles cover the whole run; window=True uses only the last
+        latency_window responses, which is cheap enough for every UI frame.
+        """
+        if window:
+            buckets = [(latency, 1) for latency in sorted(self.recent_latencies)]
+            total = len(buckets)
+        else:
+            buckets = sorted(self.latency_counts.items())
+            total = self.stats["completed"]
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "outstanding": len(self.outstanding),
+            "node_load": dict(self.node_load),
+            "hedge_delay": round(self.current_hedge_delay(), 2),
+            "p50": round(histogram_percentile(buckets, total, 50), 2),
+            "p95": round(histogram_percentile(buckets, total, 95), 2),
+            "p99": round(histogram_percentile(buckets, total, 99), 2),
+            "p999": round(histogram_percentile(buckets, total, 99.9), 2),
+            "extra_load": round(self.stats["backend_requests"] / requests - 1, 4) if requests else 0.0,
+        }
 
+    handlers = {
+        MessageKind.READ: on_read,
+        MessageKind.READ_RESPONSE: complete_request,
+        MessageKind.READ_REJECTED: handle_rejection,
+    }
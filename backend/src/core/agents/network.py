@@ -7,15 +7,23 @@ class NetworkAgent:
         self.sim = sim
         self.latency_fn = latency_fn
         self.drop_prob = drop_prob
+        # Undelivered message events per destination agent_id, so traffic to a
+        # node that goes down can be cancelled instead of sitting in the queue
+        self.in_flight = {}
 
     def send(self, message):
+        """Schedule delivery of message; returns the delivery event handle, or None if dropped."""
         if random.random() < self.drop_prob:
-            return
+            return None
+        if not getattr(message.dst, "active", True):
+            return None  # Dead nodes would discard it on arrival anyway
 
         delay = self.latency_fn()
+        pending = self.in_flight.setdefault(message.dst.agent_id, set())
         
         # Create async callback wrapper to properly handle async handle_message
         async def deliver_message():
+            pending.discard(event)
             try:
                 await message.dst.handle_message(message)
             except Exception as e:
@@ -25,4 +33,11 @@ class NetworkAgent:
             time=self.sim.time + delay,
             callback=deliver_message
         )
-        self.sim.event_queue.push(event)
\ No newline at end of file
+        event.on_cancel = pending.discard  # Cancelled sends (e.g. a losing hedge) never deliver
+        pending.add(event)
+        return self.sim.event_queue.push(event)
+
+    def cancel_in_flight(self, dst):
+        """Cancel every undelivered message addressed to dst; returns how many were dropped."""
+        pending = self.in_flight.pop(dst.agent_id, set())
+        return sum(1 for event in list(pending) if event.cancel())
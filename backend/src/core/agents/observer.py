@@ -46,6 +46,9 @@ class ObserverAgent(BaseAgent):
             elif event_type == "CACHE_MISS":
                 self.metrics["agent_stats"][node_id]["misses"] += 1
         
+        if event_type == "NODE_RECOVERED":
+            self.metrics.setdefault("recoveries", []).append(details)
+
         if event_type == "CACHE_HIT":
             self.metrics["hits"] += 1
             self.metrics["total_reads"] += 1
@@ -53,6 +56,16 @@ class ObserverAgent(BaseAgent):
             self.metrics["misses"] += 1
             self.metrics["total_reads"] += 1
 
+    def tier_summary(self):
+        """Hit ratio per cache tier and the share of L1 misses the L2 kept off the DB."""
+        l1_hits, l1_misses = self.metrics["hits"], self.metrics["misses"]
+        l2_hits, l2_misses = self.metrics.get("L2_HIT", 0), self.metrics.get("L2_MISS", 0)
+        return {
+            "l1_hit_ratio": round(l1_hits / (l1_hits + l1_misses), 4) if l1_hits + l1_misses else 0.0,
+            "l2_hit_ratio": round(l2_hits / (l2_hits + l2_misses), 4) if l2_hits + l2_misses else 0.0,
+            "db_offload": round(l2_hits / l1_misses, 4) if l1_misses else 0.0,
+        }
+
     def handle_message(self, message):
         # The observer basically just watches, it doesn't respond
         pass
@@ -1,59 +1,242 @@
+from collections import deque
 from agents.base import BaseAgent
 from cache.cache_entry import CacheEntry
-from messages.message import Message
+from messages.message import MessageKind
+from messages.read_write import ReadResponseMessage, ReadRejectedMessage, ReadDbMessage, ReadL2Message
+from messages.cache_transfer import L2PutMessage, L2TouchMessage, SnapshotRequestMessage, CacheSnapshotMessage, PrefetchMessage
 
 class ServiceNode(BaseAgent):
-    def __init__(self, agent_id, sim, cache, network, db, observer=None):
+    CACHE_TTL = 500  # Longer TTL for better hit ratio
+    RECOVERY_WINDOW = 10  # Reads in the rolling hit-ratio window
+    RECOVERY_FRACTION = 0.9  # Recovered once that window is back to this share of the pre-failure ratio
+    WARMUP_STRATEGIES = ("cold", "peer", "prefetch")
+
+    def __init__(self, agent_id, sim, cache, network, db, observer=None, l2_shards=None, l2_policy="non_inclusive",
+                 service=None):
         super().__init__(agent_id, sim)
         self.cache = cache
         self.network = network
         self.db = db
         self.observer = observer
-        self.pending_requests = {}
+        self.l2_shards = l2_shards or []  # Shared L2 tier consulted before the DB, if any
+        self.l2_policy = l2_policy
+        self.service = service  # ServiceQueue for READs; None answers instantly
+        self.pending_requests = {}  # key -> [(requester, req_id, attempt)] waiting on the DB
+        self.invalidated = {}  # key -> version of the last INVALIDATE; older responses are not cached
         self.active = True
+        self.peers = []  # All service nodes in load-balancer ring order, for snapshot warm-up
+        self.recent_reads = deque(maxlen=self.RECOVERY_WINDOW)  # 1 = hit, 0 = miss
+        self.recovery = None  # Progress since the last restart, until the hit ratio recovers
+        self.baseline_hit_ratio = None  # Hit ratio before the last failure: the target after restart
+        self.recovery_misses = deque(maxlen=self.RECOVERY_WINDOW + 1)  # (read number, time) of recent post-restart misses
 
     async def handle_message(self, message):
-        if not getattr(self, "active", True):
+        if not self.active:
             return
+        result = self.dispatch(message)
+        if result is not None:
+            await result
+
+    async def on_read(self, message):
+        if self.service is None:
+            await self.handle_read(message, message.src)
+        elif not self.service.submit(lambda: self.handle_read(message, message.src)):
+            await self.shed(message, message.src)
+
+    def on_invalidate(self, message):
+        self.cache.store.pop(message.key, None)
+        self.invalidated[message.key] = max(message.version, self.invalidated.get(message.key, 0))
 
-        payload = message.payload
-        if payload["type"] == "READ":
-            await self.handle_read(payload, message.src)
-
-        elif payload["type"] == "INVALIDATE":
-            self.cache.store.pop(payload["key"], None)
-
-        elif payload["type"] == "READ_RESPONSE":
-            # Response from DB
-            key = payload["key"]
-            value = payload["value"]
-            version = payload["version"]
-            ttl = 500  # Longer TTL for better hit ratio
-            entry = CacheEntry(key, value, version, ttl, self.sim.time)
-            self.cache.put(key, entry)
+    def on_read_response(self, message):
+        # Response from DB (or the L2 tier). An L2 hit keeps its remaining expiry, so a
+        # value is never cached for longer than CACHE_TTL after it was read from the DB.
+        key = message.key
+        ttl = self.CACHE_TTL if message.expiry is None else min(self.CACHE_TTL, message.expiry - self.sim.time)
+        if ttl > 0 and message.version >= self.invalidated.get(key, 0):
+            entry = CacheEntry(key, message.value, message.version, ttl, self.sim.time)
+            self.fill(key, entry)
             print(f"[{self.agent_id}] Cached {key} from DB response (expiry: {entry.expiry:.2f}) - cache size: {len(self.cache.store)}")
-            if key in self.pending_requests:
-                requester = self.pending_requests.pop(key)
-                response = Message(src=self, dst=requester, payload={"type": "READ_RESPONSE", "key": key, "value": value, "version": version})
-                self.network.send(response)
+        for requester, req_id, attempt in self.pending_requests.pop(key, []):
+            self.reply(requester, key, message.value, message.version, req_id, attempt)
+
+    def on_read_rejected(self, message):
+        # Upstream (DB or L2) shed our read; fail everyone waiting on it
+        for requester, req_id, attempt in self.pending_requests.pop(message.key, []):
+            self.reject(requester, message.key, req_id, attempt)
+
+    def on_snapshot_request(self, message):
+        # A restarting peer wants our hottest entries among the keys it owns on the LB ring
+        def owned_and_live(key, entry):
+            return hash(key) % message.ring_size == message.index and entry.expiry > self.sim.time
+        entries = [(key, entry.value, entry.version, entry.expiry)
+                   for key, entry in self.cache.hottest(message.k, where=owned_and_live)]
+        self.network.send(CacheSnapshotMessage(self, message.src, entries))
+
+    def on_warmup_entries(self, message):
+        self.install(message.entries)
+        if message.kind == MessageKind.PREFETCH_RESPONSE and self.recovery:
+            self.recovery["warmup_db_reads"] += len(message.entries)
+            self.recovery["warmup_shed"] = message.shed
+        print(f"[{self.agent_id}] Warmed cache with {len(message.entries)} entries - cache size: {len(self.cache.store)}")
+
+    handlers = {
+        MessageKind.READ: on_read,
+        MessageKind.INVALIDATE: on_invalidate,
+        MessageKind.READ_RESPONSE: on_read_response,
+        MessageKind.READ_REJECTED: on_read_rejected,
+        MessageKind.SNAPSHOT_REQUEST: on_snapshot_request,
+        MessageKind.CACHE_SNAPSHOT: on_warmup_entries,
+        MessageKind.PREFETCH_RESPONSE: on_warmup_entries,
+    }
+
+    def install(self, entries):
+        # Entries arrive hottest first; insert coldest first so the hottest end up most recent.
+        # Snapshot entries keep their expiry, DB entries (expiry None) get a fresh TTL.
+        for key, value, version, expiry in reversed(entries):
+            ttl = expiry - self.sim.time if expiry else self.CACHE_TTL
+            if ttl > 0:
+                self.fill(key, CacheEntry(key, value, version, ttl, self.sim.time))
+
+    def fill(self, key, entry):
+        evicted = self.cache.put(key, entry)
+        if evicted and self.l2_shards and self.l2_policy == "exclusive":
+            # Exclusive hierarchy: L1 victims are demoted into the L2 tier
+            victim_key, victim = evicted
+            if victim.expiry > self.sim.time:
+                demote = L2PutMessage(self, self.l2_shard(victim_key), victim_key, victim.value, victim.version, victim.expiry)
+                self.network.send(demote)
+
+    def l2_shard(self, key):
+        return self.l2_shards[hash(key) % len(self.l2_shards)]
+
+    async def fail(self):
+        self.active = False
+        if self.service:
+            self.service.reset()
+        recovery = self.recovery
+        if not recovery:
+            self.baseline_hit_ratio = sum(self.recent_reads) / len(self.recent_reads) if self.recent_reads else None
+            return
+        # Failed again before recovering: report the record as censored, and keep its
+        # pre-failure baseline, since recent_reads only covers the unrecovered stretch
+        self.recovery = None
+        self.baseline_hit_ratio = recovery["baseline_hit_ratio"]
+        recovery["failed_after"] = round(self.sim.time - recovery["restarted_at"], 2)
+        print(f"[{self.agent_id}] Failed {recovery['failed_after']} after restart, before recovering ({recovery['strategy']})")
+        if self.observer:
+            await self.observer.report_event("NODE_RECOVERED", recovery)
+
+    async def restart(self, warmup="cold", k=5):
+        """
+        Bring the node back with an empty cache, then warm it up:
+          - "cold": nothing, the cache refills from misses
+          - "peer": ask the next live node in the ring (which took over our
+            keys while we were down) for its k hottest entries among our keys
+          - "prefetch": ask the database for its k most read keys among ours
+        Our keys are those the load balancer hashes to our ring position
+        (hash(key) % len(peers)); without peers, prefetch takes any keys.
+        The hit ratio to recover is the one fail() saw before the node went down.
+        """
+        if warmup not in self.WARMUP_STRATEGIES:
+            raise ValueError(f"Unknown warm-up strategy '{warmup}', expected one of {self.WARMUP_STRATEGIES}")
+        self.active = True
+        self.cache.clear()
+        self.pending_requests.clear()
+        self.recent_reads.clear()
+        self.recovery_misses.clear()
+        self.recovery = {
+            "node": self.agent_id,
+            "strategy": warmup,
+            "restarted_at": round(self.sim.time, 2),
+            "baseline_hit_ratio": self.baseline_hit_ratio,
+            "recovered": False,  # Stays False if the node fails again first (a censored record)
+            "warmup_db_reads": 0,
+            "warmup_shed": False,  # Set if the DB shed our prefetch, so the node restarted cold
+            "recovery_misses": 0,
+            "reads": 0,
+        }
+        index, ring_size = (self.peers.index(self), len(self.peers)) if self in self.peers else (None, None)
+        if warmup == "peer":
+            peer = self.snapshot_peer()
+            if peer:
+                self.network.send(SnapshotRequestMessage(self, peer, k, index, ring_size))
+        elif warmup == "prefetch":
+            self.network.send(PrefetchMessage(self, self.db, k, index, ring_size))
+        if self.observer:
+            await self.observer.report_event("NODE_RESTARTED", {"node": self.agent_id, "strategy": warmup})
+
+    def snapshot_peer(self):
+        if self not in self.peers:
+            return None
+        index = self.peers.index(self)
+        for offset in range(1, len(self.peers)):
+            peer = self.peers[(index + offset) % len(self.peers)]
+            if getattr(peer, "active", True):
+                return peer
+        return None
+
+    async def record_read(self, hit):
+        self.recent_reads.append(1 if hit else 0)
+        recovery = self.recovery
+        if not recovery:
+            return
+        recovery["reads"] += 1
+        if not hit:
+            recovery["recovery_misses"] += 1  # Each one is a DB read the warm-up did not save
+            self.recovery_misses.append((recovery["reads"], self.sim.time))
+        if len(self.recent_reads) < self.RECOVERY_WINDOW:
+            return
+        baseline = recovery["baseline_hit_ratio"] or 0.0
+        if sum(self.recent_reads) / len(self.recent_reads) >= self.RECOVERY_FRACTION * baseline:
+            # Recovered since the last miss before this window: a node whose warm-up saved every
+            # miss until then scores 0, however long the window took to fill
+            window_start = recovery["reads"] - self.RECOVERY_WINDOW
+            earlier = [time for read, time in self.recovery_misses if read <= window_start]
+            recovered_at = earlier[-1] if earlier else recovery["restarted_at"]
+            recovery["time_to_recover"] = round(max(0.0, recovered_at - recovery["restarted_at"]), 2)
+            recovery["detected_after"] = round(self.sim.time - recovery["restarted_at"], 2)
+            recovery["recovered"] = True
+            self.recovery = None
+            print(f"[{self.agent_id}] Hit ratio recovered {recovery['time_to_recover']} after restart ({recovery['strategy']})")
+            if self.observer:
+                await self.observer.report_event("NODE_RECOVERED", recovery)
+
+    async def shed(self, request, requester):
+        print(f"[{self.agent_id}] Queue full, rejecting read for {request.key}")
+        if self.observer:
+            await self.observer.report_event("REQUEST_REJECTED", {"node": self.agent_id, "key": request.key})
+        self.reject(requester, request.key, request.req_id, request.attempt)
+
+    def reject(self, requester, key, req_id=None, attempt=0):
+        self.network.send(ReadRejectedMessage(self, requester, key, req_id, attempt))
+
+    def reply(self, requester, key, value, version, req_id=None, attempt=0):
+        # req_id and attempt are echoed so the load balancer can match responses to requests
+        self.network.send(ReadResponseMessage(self, requester, key, value, version, req_id, attempt=attempt))
 
-    async def handle_read(self, payload, requester):
-        key = payload["key"]
+    async def handle_read(self, request, requester):
+        key = request.key
         entry = self.cache.get(key)
         if entry and entry.expiry > self.sim.time:
             # Cache hit
             print(f"[{self.agent_id}] CACHE HIT for {key} (expiry: {entry.expiry:.2f}, current time: {self.sim.time:.2f})")
             if self.observer:
                 await self.observer.report_event("CACHE_HIT", {"node": self.agent_id, "key": key})
-            # Use module-level Message import (don't re-import here!)
-            response = Message(src=self, dst=requester, payload={"type": "READ_RESPONSE", "key": key, "value": entry.value, "version": entry.version})
-            self.network.send(response)
+            await self.record_read(True)
+            if self.l2_shards and self.l2_policy == "inclusive":
+                # Recency hint, or L2 would evict (and back-invalidate) the keys hottest in L1
+                self.network.send(L2TouchMessage(self, self.l2_shard(key), key))
+            self.reply(requester, key, entry.value, entry.version, request.req_id, request.attempt)
         else:
             # Cache miss, read from DB
             reason = "not in cache" if not entry else f"expired (expiry: {entry.expiry:.2f}, time: {self.sim.time:.2f})"
             print(f"[{self.agent_id}] CACHE MISS for {key} - {reason}")
             if self.observer:
                 await self.observer.report_event("CACHE_MISS", {"node": self.agent_id, "key": key})
-            self.pending_requests[key] = requester
-            db_request = Message(src=self, dst=self.db, payload={"type": "READ_DB", "key": key})
-            self.network.send(db_request)
\ No newline at end of file
+            await self.record_read(False)
+            self.pending_requests.setdefault(key, []).append((requester, request.req_id, request.attempt))
+            if self.l2_shards:
+                upstream = ReadL2Message(self, self.l2_shard(key), key)
+            else:
+                upstream = ReadDbMessage(self, self.db, key)
+            self.network.send(upstream)
\ No newline at end of file
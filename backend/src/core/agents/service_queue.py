@@ -0,0 +1,104 @@
+import math
+import random
+from collections import deque
+from engine.event import Event
+
+
+def make_service_time(dist, mean):
+    """Service-time sampler with the given mean, or None for instant service."""
+    if not mean:
+        return None
+    if dist == "constant":
+        return lambda: mean
+    if dist == "exponential":
+        return lambda: random.expovariate(1 / mean)
+    if dist == "lognormal":
+        # sigma=1 gives a heavy-ish tail; mu is chosen so the mean matches
+        return lambda: random.lognormvariate(math.log(mean) - 0.5, 1.0)
+    raise ValueError(f"Unknown service-time distribution '{dist}'")
+
+
+class ServiceQueue:
+    """
+    Multi-server queue with a bounded waiting room (M/G/c/K style) for an
+    agent's request handling. Each job occupies one of `workers` for
+    service_time_fn() time units and runs when its service completes. Jobs
+    wait FIFO while all workers are busy; once max_queue are waiting, new
+    jobs are rejected (load shedding).
+    """
+    def __init__(self, sim, service_time_fn, workers=1, max_queue=None):
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        self.sim = sim
+        self.service_time_fn = service_time_fn
+        self.workers = workers
+        self.max_queue = max_queue  # None = unbounded
+        self.waiting = deque()  # (enqueued_at, job)
+        self.in_service = set()  # Completion events, cancelled on reset()
+        self.stats = {
+            "accepted": 0,
+            "rejected": 0,
+            "completed": 0,
+            "max_queue_len": 0,
+            "total_wait": 0.0,
+        }
+
+    @classmethod
+    def from_config(cls, sim, config, prefix):
+        """
+        Build from the {prefix}_service_time / _service_dist / _workers /
+        _queue_limit config keys; None when no service time is set.
+        """
+        service_time = make_service_time(config.get(f"{prefix}_service_dist", "exponential"),
+                                         config.get(f"{prefix}_service_time"))
+        if service_time is None:
+            return None
+        return cls(sim, service_time, workers=config.get(f"{prefix}_workers", 1),
+                   max_queue=config.get(f"{prefix}_queue_limit"))
+
+    def submit(self, job, sheddable=True):
+        """
+        Queue an async callable; returns False if it was shed. Jobs with
+        sheddable=False always wait, even past max_queue.
+        """
+        if len(self.in_service) < self.workers:
+            self.stats["accepted"] += 1
+            self._start(job)
+            return True
+        if sheddable and self.max_queue is not None and len(self.waiting) >= self.max_queue:
+            self.stats["rejected"] += 1
+            return False
+        self.stats["accepted"] += 1
+        self.waiting.append((self.sim.time, job))
+        self.stats["max_queue_len"] = max(self.stats["max_queue_len"], len(self.waiting))
+        return True
+
+    def _start(self, job):
+        event = Event(time=self.sim.time + self.service_time_fn(), callback=lambda: self._finish(event, job))
+        self.in_service.add(self.sim.event_queue.push(event))
+
+    async def _finish(self, event, job):
+        self.in_service.discard(event)
+        self.stats["completed"] += 1
+        if self.waiting:
+            enqueued_at, next_job = self.waiting.popleft()
+            self.stats["total_wait"] += self.sim.time - enqueued_at
+            self._start(next_job)
+        await job()
+
+    def reset(self):
+        """Drop queued and in-service work, e.g. when the agent dies."""
+        for event in self.in_service:
+            event.cancel()
+        self.in_service.clear()
+        self.waiting.clear()
+
+    def report(self):
+        started = self.stats["accepted"] - len(self.waiting)
+        return {
+            **self.stats,
+            "total_wait": round(self.stats["total_wait"], 2),
+            "queue_len": len(self.waiting),
+            "busy_workers": len(self.in_service),
+            "mean_wait": round(self.stats["total_wait"] / started, 3) if started else 0.0,
+        }
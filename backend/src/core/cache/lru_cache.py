@@ -1,4 +1,5 @@
 from collections import OrderedDict
+import itertools
 
 class LRUCache:
     def __init__(self, capacity):
@@ -12,7 +13,19 @@ class LRUCache:
         return self.store[key]
 
     def put(self, key, value):
+        """Insert or refresh key; returns the evicted (key, value) pair, if any."""
         self.store[key] = value
         self.store.move_to_end(key)
         if len(self.store) > self.capacity:
-            self.store.popitem(last=False)
\ No newline at end of file
+            return self.store.popitem(last=False)
+        return None
+
+    def hottest(self, k, where=None):
+        """The k most recently used (key, value) pairs, hottest first, optionally only those where(key, value)."""
+        items = reversed(self.store.items())
+        if where:
+            items = (item for item in items if where(*item))
+        return list(itertools.islice(items, k))
+
+    def clear(self):
+        self.store.clear()
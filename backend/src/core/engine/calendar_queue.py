@@ -0,0 +1,138 @@
+from bisect import insort
+import heapq
+
+
+class CalendarQueue:
+    """
+    Calendar queue (Brown, 1988): events are hashed by time into a ring of
+    "day" buckets, each one bucket_width wide, so enqueue and dequeue are
+    amortised O(1) when the bucket width tracks the spacing between events.
+    The ring is resized (and the width re-estimated) whenever the number of
+    pending events drifts too far from the number of buckets.
+
+    Buckets hold (time, id, event) tuples so ordering is done by C-level
+    tuple comparison instead of Event.__lt__. Cancelled events are left in
+    place as tombstones, as in EventQueue.
+    """
+    MIN_BUCKETS = 2
+    WIDTH_SAMPLE = 25
+    COMPACT_MIN = 64
+    COMPACT_RATIO = 0.5
+
+    def __init__(self, bucket_count=MIN_BUCKETS, bucket_width=1.0):
+        self._size = 0  # Stored entries, tombstones included
+        self.tombstones = 0
+        self._setup(max(bucket_count, self.MIN_BUCKETS), bucket_width, 0.0)
+
+    def _setup(self, bucket_count, bucket_width, start_time):
+        self.buckets = [[] for _ in range(bucket_count)]
+        self.bucket_width = bucket_width
+        self._nbuckets = bucket_count
+        # Index of the "day" (time // width) the dequeue cursor is on
+        self._day = int(start_time / bucket_width)
+        self._grow_at = 2 * bucket_count
+        self._shrink_at = bucket_count // 2 - 2
+
+    def push(self, event):
+        event._queue = self
+        day = int(event.time / self.bucket_width)
+        insort(self.buckets[day % self._nbuckets], (event.time, event.id, event))
+        if day < self._day:
+            # Scheduled before the cursor; rewind so it is not skipped
+            self._day = day
+        self._size += 1
+        if self._size > self._grow_at:
+            self._resize(2 * self._nbuckets)
+        return event
+
+    def pop(self):
+        bucket = self._locate()
+        event = bucket.pop(0)[2]
+        event._queue = None
+        self._size -= 1
+        if self._size < self._shrink_at and self._nbuckets > self.MIN_BUCKETS:
+            self._resize(self._nbuckets // 2)
+        return event
+
+    def peek(self):
+        return self._locate()[0][2]
+
+    def empty(self):
+        return len(self) == 0
+
+    def __len__(self):
+        return self._size - self.tombstones
+
+    def discard(self, event):
+        """Account for a cancelled event (called by Event.cancel)."""
+        self.tombstones += 1
+        if self.tombstones > self.COMPACT_MIN and self.tombstones > self._size * self.COMPACT_RATIO:
+            self.compact()
+
+    def compact(self):
+        """Physically remove cancelled events from every bucket."""
+        for i, bucket in enumerate(self.buckets):
+            live = []
+            for entry in bucket:
+                if entry[2].cancelled:
+                    entry[2]._queue = None
+                else:
+                    live.append(entry)
+            self.buckets[i] = live
+        self._size -= self.tombstones
+        self.tombstones = 0
+        if self._size < self._shrink_at and self._nbuckets > self.MIN_BUCKETS:
+            self._resize(self._size)
+
+    def _locate(self):
+        """Advance the cursor to the bucket holding the earliest live event."""
+        while True:
+            bucket = self._earliest_bucket()
+            head = bucket[0][2]
+            if not head.cancelled:
+                return bucket
+            bucket.pop(0)
+            head._queue = None
+            self._size -= 1
+            self.tombstones -= 1
+
+    def _earliest_bucket(self):
+        if self._size == 0:
+            raise IndexError("peek/pop from an empty calendar queue")
+        width = self.bucket_width
+        buckets = self.buckets
+        nbuckets = self._nbuckets
+        day = self._day
+        # One lap around the calendar ("year"), only taking events due today
+        for _ in range(nbuckets):
+            bucket = buckets[day % nbuckets]
+            if bucket and int(bucket[0][0] / width) <= day:
+                self._day = day
+                return bucket
+            day += 1
+        # Nothing due this year: jump straight to the earliest pending event
+        earliest = min(bucket[0] for bucket in buckets if bucket)
+        self._day = int(earliest[0] / width)
+        return buckets[self._day % nbuckets]
+
+    def _resize(self, bucket_count):
+        entries = [entry for bucket in self.buckets for entry in bucket]
+        width = self._estimate_width(entries)
+        start_time = min(entries)[0] if entries else self._day * self.bucket_width
+        self._setup(max(bucket_count, self.MIN_BUCKETS), width, start_time)
+        for entry in entries:
+            self.buckets[int(entry[0] / width) % self._nbuckets].append(entry)
+        for bucket in self.buckets:
+            bucket.sort()
+
+    def _estimate_width(self, entries):
+        # Brown's heuristic: three times the mean gap between the earliest
+        # events, ignoring gaps more than twice the raw average
+        sample = heapq.nsmallest(self.WIDTH_SAMPLE, entries)
+        if len(sample) < 2:
+            return self.bucket_width
+        gaps = [b[0] - a[0] for a, b in zip(sample, sample[1:])]
+        mean = sum(gaps) / len(gaps)
+        close = [gap for gap in gaps if gap <= 2 * mean]
+        width = 3 * sum(close) / len(close) if close else 0
+        return width if width > 0 else self.bucket_width
@@ -7,22 +7,85 @@ class Event:
         self.callback = callback
         self.payload = payload
         self.id = next(Event._ids)
+        self.cancelled = False
+        self._queue = None  # Set while the event is pending in a queue
+        self.on_cancel = None  # Called with the event when it is cancelled, to drop outside references
 
     _ids = itertools.count()
 
     def __lt__(self, other):
         return (self.time, self.id) < (other.time, other.id)
 
+    @property
+    def pending(self):
+        return self._queue is not None and not self.cancelled
+
+    def cancel(self):
+        """
+        Cancel a pending event. push() returns the event itself, so it doubles
+        as the cancellation handle. Returns False if the event already ran or
+        was cancelled before.
+        """
+        if self._queue is None or self.cancelled:
+            return False
+        self.cancelled = True
+        self._queue.discard(self)
+        if self.on_cancel:
+            self.on_cancel(self)
+        return True
+
 
 class EventQueue:
+    # Cancelled events stay in the heap as tombstones and are skipped lazily;
+    # the heap is rebuilt once they outnumber COMPACT_RATIO of its entries
+    COMPACT_MIN = 64
+    COMPACT_RATIO = 0.5
+
     def __init__(self):
         self.queue = []
+        self.tombstones = 0
 
     def push(self, event: Event):
+        event._queue = self
         heapq.heappush(self.queue, event)
+        return event
 
     def pop(self):
-        return heapq.heappop(self.queue)
+        self._drop_cancelled()
+        event = heapq.heappop(self.queue)
+        event._queue = None
+        return event
+
+    def peek(self):
+        self._drop_cancelled()
+        return self.queue[0]
 
     def empty(self):
-        return len(self.queue) == 0
\ No newline at end of file
+        return len(self) == 0
+
+    def __len__(self):
+        return len(self.queue) - self.tombstones
+
+    def discard(self, event: Event):
+        """Account for a cancelled event (called by Event.cancel)."""
+        self.tombstones += 1
+        if self.tombstones > self.COMPACT_MIN and self.tombstones > len(self.queue) * self.COMPACT_RATIO:
+            self.compact()
+
+    def compact(self):
+        """Physically remove cancelled events and restore the heap."""
+        live = []
+        for event in self.queue:
+            if event.cancelled:
+                event._queue = None
+            else:
+                live.append(event)
+        heapq.heapify(live)
+        self.queue = live
+        self.tombstones = 0
+
+    def _drop_cancelled(self):
+        queue = self.queue
+        while queue and queue[0].cancelled:
+            heapq.heappop(queue)._queue = None
+            self.tombstones -= 1
@@ -1,9 +1,18 @@
 from .event import EventQueue
+from .calendar_queue import CalendarQueue
+
+# Selectable event schedulers; all expose push/pop/peek/empty/len
+SCHEDULERS = {
+    "heap": EventQueue,
+    "calendar": CalendarQueue,
+}
 
 class Simulation:
-    def __init__(self):
+    def __init__(self, scheduler="heap"):
+        if scheduler not in SCHEDULERS:
+            raise ValueError(f"Unknown scheduler '{scheduler}', expected one of {sorted(SCHEDULERS)}")
         self.time = 0
-        self.event_queue = EventQueue()
+        self.event_queue = SCHEDULERS[scheduler]()
         self.agents = []
         self._event_count = 0
 
@@ -11,10 +20,9 @@ class Simulation:
         # Process all events up to until_time
         events_processed = 0
         while not self.event_queue.empty():
+            if self.event_queue.peek().time > until_time:
+                break  # Next event belongs to a later chunk
             event = self.event_queue.pop()
-            if event.time > until_time:
-                self.event_queue.push(event) # Push back if it's for future
-                break
             self.time = event.time
             try:
                 # Execute event callback (supports both sync and async)
@@ -34,4 +42,5 @@ class Simulation:
         
         # Ensure time advances to at least until_time even if no events
         if self.time < until_time:
-            self.time = until_time
\ No newline at end of file
+            self.time = until_time
+        return events_processed
@@ -0,0 +1,43 @@
+"""
+Compare load balancer tail latency with and without hedged reads.
+
+The network has a heavy tail (a few percent of messages are slow) and drops
+a small fraction of messages, which is where hedging and retries pay off.
+Usage:
+
+    python experiments/hedging_run.py [duration]
+"""
+import sys
+import os
+import random
+sys.path.insert(0, os.path.dirname(__file__))
+
+from topology import build, run as run_topology
+
+
+def slow_tail_latency():
+    # 95% of messages take 1-5 units, the rest 20-80
+    if random.random() < 0.05:
+        return random.uniform(20, 80)
+    return random.uniform(1, 5)
+
+
+def run(duration, seed=7, **lb_options):
+    topology = build(seed, latency_fn=slow_tail_latency, drop_prob=0.01, duration=duration, **lb_options)
+    run_topology(topology, duration + 500)
+    return topology.lb.report()
+
+
+if __name__ == "__main__":
+    duration = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    scenarios = [
+        ("no hedging", {"hedging": False}),
+        ("hedge p95", {"hedging": True, "hedge_percentile": 95}),
+        ("hedge p90", {"hedging": True, "hedge_percentile": 90}),
+        ("hedge p75", {"hedging": True, "hedge_percentile": 75}),
+    ]
+    columns = ["p50", "p95", "p99", "p999", "timeouts", "extra_load"]
+    print(f"{'scenario':<12} " + " ".join(f"{c:>10}" for c in columns))
+    for name, options in scenarios:
+        report = run(duration, **options)
+        print(f"{name:<12} " + " ".join(f"{report[c]:>10}" for c in columns))
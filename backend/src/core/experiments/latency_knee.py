@@ -0,0 +1,56 @@
+"""
+Find the request rate at which tail latency breaks down.
+
+Cache nodes and the database get exponential service times, a fixed number
+of workers and bounded queues, and the client offers Poisson load at
+increasing rates. For each load balancer policy it reports throughput,
+p50/p99 latency and the share of reads that failed (shed or timed out).
+Usage:
+
+    python experiments/latency_knee.py [reads_per_point]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from topology import build, run as run_topology
+from agents.load_balancer import LoadBalancerAgent
+
+NODES = 3
+NODE_SERVICE_TIME = 1.0  # One worker each: ~3 reads per time unit across the tier
+DB_SERVICE_TIME = 2.0
+DB_WORKERS = 4
+QUEUE_LIMIT = 20
+KEY_SPACE = 100
+SKEW = 1.0  # Popular keys make their affinity nodes hot
+
+
+def run(rate, policy, reads, seed=3):
+    duration = reads / rate
+    topology = build(
+        seed, scheduler="calendar", nodes=NODES, key_space=KEY_SPACE, key_skew=SKEW,
+        request_rate=rate, duration=duration, lb_policy=policy, request_timeout=200.0,
+        node_service_time=NODE_SERVICE_TIME, node_queue_limit=QUEUE_LIMIT,
+        db_service_time=DB_SERVICE_TIME, db_workers=DB_WORKERS, db_queue_limit=QUEUE_LIMIT,
+    )
+    run_topology(topology, duration + 500)
+    report = topology.lb.report()
+    failed = report["rejected"] + report["timeouts"]
+    return {
+        "throughput": round(report["completed"] / duration, 3),
+        "p50": report["p50"],
+        "p99": report["p99"],
+        "failed": round(failed / report["requests"], 4) if report["requests"] else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    reads = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rates = [0.5, 1.0, 1.5, 2.0, 2.4, 2.7, 3.0]
+    columns = ["throughput", "p50", "p99", "failed"]
+    for policy in LoadBalancerAgent.POLICIES:
+        print(f"\npolicy={policy}")
+        print(f"{'rate':>6} " + " ".join(f"{c:>11}" for c in columns))
+        for rate in rates:
+            report = run(rate, policy, reads)
+            print(f"{rate:>6} " + " ".join(f"{report[c]:>11}" for c in columns))
@@ -0,0 +1,117 @@
+"""
+Micro-benchmark for the message representation.
+
+Compares the old representation (a Message object whose payload is a dict
+with a "type" string, dispatched by an if/elif chain of string compares)
+with the typed, slotted messages dispatched through BaseAgent's handlers
+table (BaseAgent.handle_message -> dispatch). Reports heap bytes per live
+READ_RESPONSE and ns to build and deliver a message that matches the first
+(READ) or the last (READ_REJECTED) branch of the old chain. Usage:
+
+    python experiments/message_benchmark.py [N]
+"""
+import asyncio
+import sys
+import os
+import time
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from agents.base import BaseAgent
+from messages.message import MessageKind
+from messages.read_write import ReadMessage, ReadResponseMessage, ReadRejectedMessage
+
+
+class DictMessage:
+    """The pre-typed Message: an instance __dict__ plus a payload dict."""
+    def __init__(self, src, dst, payload):
+        self.src = src
+        self.dst = dst
+        self.payload = payload
+
+
+class ChainAgent:
+    """The old dispatch: an if/elif chain in the agent's async handle_message."""
+    def __init__(self):
+        self.last = None
+
+    # Same branch order as the old ServiceNode.handle_message
+    async def handle_message(self, message):
+        payload = message.payload
+        if payload["type"] == "READ":
+            self.last = payload["key"]
+        elif payload["type"] == "INVALIDATE":
+            self.last = payload["version"]
+        elif payload["type"] == "READ_RESPONSE":
+            self.last = payload["value"]
+        elif payload["type"] == "READ_REJECTED":
+            self.last = payload["req_id"]
+
+
+class TableAgent(BaseAgent):
+    """Sync handlers behind BaseAgent's handlers table, as the real agents use it."""
+    def __init__(self):
+        super().__init__("table", None)
+        self.last = None
+
+    def on_read(self, message):
+        self.last = message.key
+
+    def on_invalidate(self, message):
+        self.last = message.version
+
+    def on_read_response(self, message):
+        self.last = message.value
+
+    def on_read_rejected(self, message):
+        self.last = message.req_id
+
+    handlers = {
+        MessageKind.READ: on_read,
+        MessageKind.INVALIDATE: on_invalidate,
+        MessageKind.READ_RESPONSE: on_read_response,
+        MessageKind.READ_REJECTED: on_read_rejected,
+    }
+
+
+def bytes_per_message(make, count=10_000):
+    # Heap growth while `count` messages are alive, as they are while in flight
+    tracemalloc.start()
+    messages = [None] * count
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        messages[i] = make(i)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used / count
+
+
+async def deliver(make, agent, n):
+    # What NetworkAgent's delivery callback does: await the agent's handle_message
+    start = time.perf_counter()
+    for i in range(n):
+        await agent.handle_message(make(i))
+    return time.perf_counter() - start
+
+
+def bench(make, agent, n, repeats=5):
+    best = min(asyncio.run(deliver(make, agent, n)) for _ in range(repeats))
+    return best / n * 1e9
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"{'representation':<16} {'bytes/msg':>10} {'READ ns':>8} {'REJECTED ns':>12}")
+    results = [
+        ("dict payload", ChainAgent(),
+         lambda i: DictMessage(None, None, {"type": "READ_RESPONSE", "key": "key_1", "value": i, "version": 1, "req_id": i}),
+         lambda i: DictMessage(None, None, {"type": "READ", "key": "key_1", "req_id": i}),
+         lambda i: DictMessage(None, None, {"type": "READ_REJECTED", "key": "key_1", "req_id": i})),
+        ("typed slots", TableAgent(),
+         lambda i: ReadResponseMessage(None, None, "key_1", i, 1, i),
+         lambda i: ReadMessage(None, None, "key_1", i),
+         lambda i: ReadRejectedMessage(None, None, "key_1", i)),
+    ]
+    for name, agent, make_response, make_first, make_last in results:
+        size = bytes_per_message(make_response)
+        print(f"{name:<16} {size:>10.0f} {bench(make_first, agent, n):>8.0f} {bench(make_last, agent, n):>12.0f}")
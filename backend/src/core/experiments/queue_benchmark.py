@@ -0,0 +1,41 @@
+"""
+Hold-model benchmark for the event schedulers.
+
+Fills each queue with N pending events, then times a steady-state mix of
+pop + push (each popped event schedules one successor), which is what the
+simulation loop does. Usage:
+
+    python experiments/queue_benchmark.py [N ...]
+"""
+import sys
+import os
+import random
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from engine.event import Event
+from engine.simulation import SCHEDULERS
+
+HOLD_OPS = 200_000
+
+
+def bench(scheduler, pending, seed=42):
+    random.seed(seed)
+    queue = SCHEDULERS[scheduler]()
+    for _ in range(pending):
+        queue.push(Event(random.expovariate(1.0) * pending, None))
+
+    start = time.perf_counter()
+    for _ in range(HOLD_OPS):
+        event = queue.pop()
+        queue.push(Event(event.time + random.expovariate(1.0) * pending, None))
+    elapsed = time.perf_counter() - start
+    return elapsed / HOLD_OPS * 1e9
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10**3, 10**4, 10**5, 10**6]
+    print(f"{'pending':>10} " + " ".join(f"{name + ' ns/op':>16}" for name in SCHEDULERS))
+    for pending in sizes:
+        results = [bench(name, pending) for name in SCHEDULERS]
+        print(f"{pending:>10} " + " ".join(f"{ns:>16.0f}" for ns in results))
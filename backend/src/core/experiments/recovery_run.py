@@ -0,0 +1,67 @@
+"""
+Compare cache warm-up strategies for nodes restarted after ChaosMonkey kills.
+
+Nodes fail and come back with exponential MTTF/MTTR. For each strategy it
+reports how long a restarted node takes to get its hit ratio back, how many
+misses it takes on the way, and how much DB load the strategy costs.
+
+mean_ttr runs from the restart to the last miss before the first rolling
+window of ServiceNode.RECOVERY_WINDOW reads that is back on target, so a
+node whose warm-up saved every miss scores 0. mean_detect is when that
+window completed: it cannot be less than the time the node needs to serve
+RECOVERY_WINDOW reads, whatever the strategy. Both average over the
+restarts that recovered; a node that failed again first, or was still
+recovering when the run ended, is counted as censored. Misses and warm-up
+DB reads are per restart, censored ones included. Usage:
+
+    python experiments/recovery_run.py [duration]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from topology import build, run as run_topology
+from agents.service_node import ServiceNode
+
+KEY_SPACE = 300
+SKEW = 0.9
+NODES = 3
+RATE = 0.5  # Client reads per time unit, spread over the nodes
+
+
+def run(duration, warmup, seed=11, mttf=2000, mttr=300, warmup_k=20):
+    topology = build(seed, nodes=NODES, key_space=KEY_SPACE, key_skew=SKEW, request_rate=RATE,
+                     duration=duration, mttf=mttf, mttr=mttr, warmup=warmup, warmup_k=warmup_k)
+    run_topology(topology, duration)
+    observer, db = topology.observer, topology.db
+
+    # Every restart's record: reported on recovery or on the next failure, or still open at the end
+    records = observer.metrics.get("recoveries", []) + [node.recovery for node in topology.nodes if node.recovery]
+    recovered = [r for r in records if r["recovered"]]
+    n, restarts = len(recovered) or 1, len(records) or 1
+    reads = observer.metrics["total_reads"] or 1
+    return {
+        "restarts": len(records),
+        "recovered": len(recovered),
+        "censored": len(records) - len(recovered),
+        "mean_ttr": round(sum(r["time_to_recover"] for r in recovered) / n, 1),
+        "mean_detect": round(sum(r["detected_after"] for r in recovered) / n, 1),
+        "misses/restart": round(sum(r["recovery_misses"] for r in records) / restarts, 2),
+        "warmup_db/restart": round(sum(r["warmup_db_reads"] for r in records) / restarts, 2),
+        "db_reads": db.reads,
+        "hit_ratio": round(observer.metrics["hits"] / reads, 3),
+    }
+
+
+if __name__ == "__main__":
+    duration = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    columns = ["restarts", "recovered", "censored", "mean_ttr", "mean_detect", "misses/restart", "warmup_db/restart",
+               "db_reads", "hit_ratio"]
+    widths = [max(13, len(c)) for c in columns]
+    print(f"{'warmup':<10} " + " ".join(f"{c:>{w}}" for c, w in zip(columns, widths)))
+    for warmup in ("cold", "peer", "prefetch"):
+        report = run(duration, warmup)
+        print(f"{warmup:<10} " + " ".join(f"{report[c]:>{w}}" for c, w in zip(columns, widths)))
+    window = ServiceNode.RECOVERY_WINDOW
+    print(f"Floors: mean_ttr 0; mean_detect ~{window * NODES / RATE:.0f} "
+          f"({window} reads per node at {RATE} reads/unit over {NODES} nodes)")
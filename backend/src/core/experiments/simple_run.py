@@ -9,7 +9,7 @@ from agents.service_node import ServiceNode
 from agents.client import Client
 from agents.database import Database
 from cache.lru_cache import LRUCache
-from messages.message import Message
+from messages.read_write import WriteMessage
 
 sim = Simulation()
 network = NetworkAgent(sim, latency_fn=lambda: 5)
@@ -25,7 +25,7 @@ db.service_nodes = [service_node]
 
 # Schedule initial events
 def write_to_db():
-    message = Message(src=client, dst=db, payload={"type": "WRITE", "key": "test_key", "value": "test_value"})
+    message = WriteMessage(client, db, "test_key", "test_value")
     network.send(message)
 
 event1 = Event(time=0, callback=write_to_db)
@@ -0,0 +1,53 @@
+"""
+Size a two-tier cache: per-node L1 plus a shared, sharded L2.
+
+Sweeps L1/L2 capacities and the non-inclusive/inclusive/exclusive policy over a Zipf-like
+key popularity and reports the hit ratio of each tier, the share of L1 misses
+absorbed by L2 (DB offload) and the reads that still reach the database.
+A WRITE_FRACTION of requests are DB writes; with the long TTL, invalidation
+is all that keeps the tiers fresh, and "stale" is the share of answers
+older than the DB's version when they arrived. Usage:
+
+    python experiments/tier_sizing.py [duration]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from topology import build, run as run_topology
+
+KEY_SPACE = 2000
+SKEW = 0.9
+TTL = 100_000  # Long enough that capacity, not expiry, limits the hit ratio
+WRITE_FRACTION = 0.05
+
+
+def run(duration, l1_size, l2_size, policy, l2_shards=2, seed=5):
+    topology = build(seed, scheduler="calendar", ttl=TTL, key_space=KEY_SPACE, key_skew=SKEW, duration=duration,
+                     write_fraction=WRITE_FRACTION, cache_size=l1_size, l2_shards=l2_shards if l2_size else 0, l2_size=l2_size, l2_policy=policy)
+    run_topology(topology, duration + 200)
+    client = topology.client.stats
+    stale = round(client["stale_reads"] / client["responses"], 4) if client["responses"] else 0.0
+    return {**topology.observer.tier_summary(), "db_reads": topology.db.reads, "p50": topology.lb.report()["p50"],
+            "back_inval": sum(shard.stats["back_invalidations"] for shard in topology.shards), "stale": stale}
+
+
+if __name__ == "__main__":
+    duration = int(sys.argv[1]) if len(sys.argv) > 1 else 150_000
+    scenarios = [
+        (50, 0, "non_inclusive"),
+        (50, 200, "non_inclusive"),
+        (50, 200, "inclusive"),
+        (50, 200, "exclusive"),
+        (50, 500, "non_inclusive"),
+        (50, 500, "inclusive"),
+        (50, 500, "exclusive"),
+        (150, 0, "non_inclusive"),
+        (150, 200, "non_inclusive"),
+        (150, 200, "exclusive"),
+    ]
+    columns = ["l1_hit_ratio", "l2_hit_ratio", "db_offload", "db_reads", "back_inval", "p50", "stale"]
+    print(f"{'L1':>5} {'L2/shard':>9} {'policy':>13} " + " ".join(f"{c:>13}" for c in columns))
+    for l1_size, l2_size, policy in scenarios:
+        report = run(duration, l1_size, l2_size, policy)
+        print(f"{l1_size:>5} {l2_size:>9} {policy:>13} " + " ".join(f"{report[c]:>13}" for c in columns))
@@ -0,0 +1,105 @@
+"""
+Shared setup for the experiment scripts.
+
+build() wires up the same topology as SimulationManager.run_simulation
+(DB, optional L2 shards, cache nodes, load balancer, client and, if mttf is
+given, a ChaosMonkey) from the same config keys, so each experiment only
+states the parameters it varies. run() then executes it with agent logging
+silenced.
+"""
+import sys
+import os
+import asyncio
+import contextlib
+import io
+import random
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from engine.simulation import Simulation
+from agents.network import NetworkAgent
+from agents.service_node import ServiceNode
+from agents.service_queue import ServiceQueue
+from agents.l2_cache import L2CacheAgent
+from agents.load_balancer import LoadBalancerAgent
+from agents.client import Client
+from agents.database import Database
+from agents.chaos_monkey import ChaosMonkeyAgent
+from agents.observer import ObserverAgent
+from cache.lru_cache import LRUCache
+
+
+class Topology:
+    """The agents of one built simulation."""
+    def __init__(self, sim, observer, network, db, shards, nodes, lb, client, chaos):
+        self.sim = sim
+        self.observer = observer
+        self.network = network
+        self.db = db
+        self.shards = shards
+        self.nodes = nodes
+        self.lb = lb
+        self.client = client
+        self.chaos = chaos
+
+
+def build(seed, scheduler="heap", latency_fn=None, drop_prob=0.0, ttl=None, **config):
+    """
+    Seed the RNG and build a topology from SimulationManager config keys
+    (nodes, cache_size, key_space, l2_*, node_*/db_* service, lb options,
+    request_rate, write_fraction, duration, mttf/mttr/warmup). ttl overrides CACHE_TTL on
+    the nodes and L2 shards.
+    """
+    random.seed(seed)
+    sim = Simulation(scheduler=scheduler)
+    observer = ObserverAgent("observer", sim)
+    network = NetworkAgent(sim, latency_fn=latency_fn or (lambda: random.uniform(1, 5)), drop_prob=drop_prob)
+    db = Database("db1", sim, network, service=ServiceQueue.from_config(sim, config, "db"))
+    key_space = config.get("key_space", 10)
+    db.seed(key_space)
+
+    l2_policy = config.get("l2_policy", "non_inclusive")
+    shards = [
+        L2CacheAgent(f"l2_{i}", sim, LRUCache(capacity=config.get("l2_size", 1000)), network, db,
+                     policy=l2_policy, observer=observer)
+        for i in range(config.get("l2_shards", 0))
+    ]
+    db.l2_shards = shards
+    nodes = [
+        ServiceNode(f"node_{i}", sim, LRUCache(capacity=config.get("cache_size", 100)), network, db,
+                    observer=observer, l2_shards=shards, l2_policy=l2_policy,
+                    service=ServiceQueue.from_config(sim, config, "node"))
+        for i in range(config.get("nodes", 3))
+    ]
+    db.service_nodes = nodes
+    for shard in shards:
+        shard.service_nodes = nodes
+    for node in nodes:
+        node.peers = nodes
+    if ttl:
+        for agent in shards + nodes:
+            agent.CACHE_TTL = ttl
+
+    lb = LoadBalancerAgent(
+        "lb1", sim, nodes, network,
+        hedging=config.get("hedging", False),
+        hedge_percentile=config.get("hedge_percentile", 95),
+        timeout=config.get("request_timeout", 50.0),
+        max_retries=config.get("max_retries", 1),
+        policy=config.get("lb_policy", "affinity"),
+        replicas=config.get("replicas", 2),
+    )
+    client = Client("client1", sim, network, [lb], max_time=config.get("duration", 1000),
+                    key_space=key_space, skew=config.get("key_skew", 0.0), rate=config.get("request_rate"),
+                    db=db, write_fraction=config.get("write_fraction", 0.0))
+    chaos = None
+    if config.get("mttf"):
+        chaos = ChaosMonkeyAgent("chaos_monkey", sim, nodes, network=network,
+                                 mttf=config["mttf"], mttr=config.get("mttr"),
+                                 warmup=config.get("warmup", "cold"), warmup_k=config.get("warmup_k", 5))
+    return Topology(sim, observer, network, db, shards, nodes, lb, client, chaos)
+
+
+def run(topology, until_time):
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(topology.sim.run(until_time=until_time))
+    return topology
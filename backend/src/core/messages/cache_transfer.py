@@ -0,0 +1,67 @@
+from messages.message import Message, MessageKind
+
+class L2PutMessage(Message):
+    """An entry evicted from an L1, demoted into an exclusive L2 shard."""
+    __slots__ = ("key", "value", "version", "expiry")
+    kind = MessageKind.L2_PUT
+
+    def __init__(self, src, dst, key, value, version, expiry):
+        self.src = src
+        self.dst = dst
+        self.key = key
+        self.value = value
+        self.version = version
+        self.expiry = expiry
+
+class L2TouchMessage(Message):
+    """An L1 hit on key, so an inclusive L2 shard keeps it recently used."""
+    __slots__ = ("key",)
+    kind = MessageKind.L2_TOUCH
+
+    def __init__(self, src, dst, key):
+        self.src = src
+        self.dst = dst
+        self.key = key
+
+class SnapshotRequestMessage(Message):
+    """Asks a peer for the hottest k entries the requester owns: hash(key) % ring_size == index."""
+    __slots__ = ("k", "index", "ring_size")
+    kind = MessageKind.SNAPSHOT_REQUEST
+
+    def __init__(self, src, dst, k, index, ring_size):
+        self.src = src
+        self.dst = dst
+        self.k = k
+        self.index = index
+        self.ring_size = ring_size
+
+class CacheSnapshotMessage(Message):
+    __slots__ = ("entries",)  # [(key, value, version, expiry)], hottest first
+    kind = MessageKind.CACHE_SNAPSHOT
+
+    def __init__(self, src, dst, entries):
+        self.src = src
+        self.dst = dst
+        self.entries = entries
+
+class PrefetchMessage(Message):
+    """Asks the DB for its k most read keys, only those the requester owns if index is set."""
+    __slots__ = ("k", "index", "ring_size")
+    kind = MessageKind.PREFETCH
+
+    def __init__(self, src, dst, k, index=None, ring_size=None):
+        self.src = src
+        self.dst = dst
+        self.k = k
+        self.index = index
+        self.ring_size = ring_size
+
+class PrefetchResponseMessage(Message):
+    __slots__ = ("entries", "shed")  # [(key, value, version, None)], hottest first
+    kind = MessageKind.PREFETCH_RESPONSE
+
+    def __init__(self, src, dst, entries, shed=False):
+        self.src = src
+        self.dst = dst
+        self.entries = entries
+        self.shed = shed  # The DB queue was full; no warm-up happened
@@ -1,4 +1,11 @@
-class InvalidateMessage:
-    def __init__(self, key, version):
+from messages.message import Message, MessageKind
+
+class InvalidateMessage(Message):
+    __slots__ = ("key", "version")
+    kind = MessageKind.INVALIDATE
+
+    def __init__(self, src, dst, key, version):
+        self.src = src
+        self.dst = dst
         self.key = key
-        self.version = version
\ No newline at end of file
+        self.version = version
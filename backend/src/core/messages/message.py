@@ -1,5 +1,40 @@
+from enum import IntEnum
+
+
+class MessageKind(IntEnum):
+    """Integer tag of every message type; agents dispatch on it."""
+    READ = 0
+    READ_RESPONSE = 1
+    READ_REJECTED = 2
+    READ_DB = 3
+    READ_L2 = 4
+    WRITE = 5
+    INVALIDATE = 6
+    L2_PUT = 7
+    SNAPSHOT_REQUEST = 8
+    CACHE_SNAPSHOT = 9
+    PREFETCH = 10
+    PREFETCH_RESPONSE = 11
+    L2_TOUCH = 12
+
+
 class Message:
-    def __init__(self, src, dst, payload):
+    """
+    Base class for inter-agent messages. Each concrete type declares its
+    fields in __slots__ (so a message is a handful of pointers, not a dict)
+    and a class-level `kind` that agents look up in their dispatch tables.
+    """
+    __slots__ = ("src", "dst")
+    kind = None
+
+    def __init__(self, src, dst):
         self.src = src
         self.dst = dst
-        self.payload = payload
\ No newline at end of file
+
+    @property
+    def payload(self):
+        """The message as the legacy {"type": ..., field: value} dict, for logs and debugging."""
+        return {"type": self.kind.name, **{name: getattr(self, name) for name in type(self).__slots__}}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.payload})"
@@ -1,8 +1,65 @@
-class ReadMessage:
-    def __init__(self, key):
+from messages.message import Message, MessageKind
+
+class ReadMessage(Message):
+    __slots__ = ("key", "req_id", "attempt")
+    kind = MessageKind.READ
+
+    def __init__(self, src, dst, key, req_id=None, attempt=0):
+        self.src = src
+        self.dst = dst
+        self.key = key
+        self.req_id = req_id  # Set by the load balancer, echoed in the answer
+        self.attempt = attempt  # Load balancer retry number, echoed too
+
+class ReadResponseMessage(Message):
+    __slots__ = ("key", "value", "version", "req_id", "expiry", "attempt")
+    kind = MessageKind.READ_RESPONSE
+
+    def __init__(self, src, dst, key, value, version, req_id=None, expiry=None, attempt=0):
+        self.src = src
+        self.dst = dst
+        self.key = key
+        self.value = value
+        self.version = version
+        self.req_id = req_id
+        self.expiry = expiry  # Set when served from a cache tier; None means fresh from the DB
+        self.attempt = attempt
+
+class ReadRejectedMessage(Message):
+    __slots__ = ("key", "req_id", "attempt")
+    kind = MessageKind.READ_REJECTED
+
+    def __init__(self, src, dst, key, req_id=None, attempt=0):
+        self.src = src
+        self.dst = dst
         self.key = key
+        self.req_id = req_id
+        self.attempt = attempt
+
+class ReadDbMessage(Message):
+    __slots__ = ("key",)
+    kind = MessageKind.READ_DB
+
+    def __init__(self, src, dst, key):
+        self.src = src
+        self.dst = dst
+        self.key = key
+
+class ReadL2Message(Message):
+    __slots__ = ("key",)
+    kind = MessageKind.READ_L2
+
+    def __init__(self, src, dst, key):
+        self.src = src
+        self.dst = dst
+        self.key = key
+
+class WriteMessage(Message):
+    __slots__ = ("key", "value")
+    kind = MessageKind.WRITE
 
-class WriteMessage:
-    def __init__(self, key, value):
+    def __init__(self, src, dst, key, value):
+        self.src = src
+        self.dst = dst
         self.key = key
-        self.value = value
\ No newline at end of file
+        self.value = value
@@ -3,7 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 import asyncio
 import json
 import uuid
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 import sys
 import os
@@ -55,6 +55,35 @@ class SimConfig(BaseModel):
     duration: int = 1000
     byzantine_nodes: int = 1
     chaos_enabled: bool = True
+    scheduler: str = "heap"
+    pacing: str = "realtime"  # "max_speed", "realtime" or "fps"
+    speed: float = 400.0  # Sim-time units per second in realtime mode
+    fps: int = 20
+    hedging: bool = False
+    hedge_percentile: float = 95
+    request_timeout: float = 50.0
+    max_retries: int = 1
+    mttf: Optional[float] = None  # Mean time to failure; None keeps the random kill loop
+    mttr: Optional[float] = None  # Mean time to repair; None means killed nodes stay down
+    warmup: str = "cold"  # "cold", "peer" or "prefetch"
+    warmup_k: int = 5
+    key_space: int = 10
+    key_skew: float = 0.0  # Zipf exponent of key popularity, 0 = uniform
+    l2_shards: int = 0  # 0 disables the shared L2 tier
+    l2_size: int = 1000  # Capacity of each L2 shard
+    l2_policy: str = "non_inclusive"  # or "inclusive", "exclusive"
+    request_rate: Optional[float] = None  # Client reads per time unit (Poisson); None = default pacing
+    write_fraction: float = 0.0  # Share of client requests that are DB writes
+    lb_policy: str = "affinity"  # "affinity", "least_outstanding" or "p2c"
+    replicas: int = 2  # Nodes per key that least_outstanding chooses between
+    node_service_time: Optional[float] = None  # Mean service time; None = instant
+    node_service_dist: str = "exponential"  # "constant", "exponential" or "lognormal"
+    node_workers: int = 1
+    node_queue_limit: Optional[int] = None  # None = unbounded
+    db_service_time: Optional[float] = None
+    db_service_dist: str = "exponential"
+    db_workers: int = 1
+    db_queue_limit: Optional[int] = None
 
 class ChatRequest(BaseModel):
     query: str
@@ -106,7 +135,36 @@ async def websocket_endpoint(websocket: WebSocket):
                     "nodes": config.get("nodes", 3),
                     "cache_size": config.get("cacheSize", 100),
                     "duration": config.get("duration", 1000),
-                    "chaos_enabled": config.get("chaos", True)
+                    "chaos_enabled": config.get("chaos", True),
+                    "scheduler": config.get("scheduler", "heap"),
+                    "pacing": config.get("pacing", "realtime"),
+                    "speed": config.get("speed", 400.0),
+                    "fps": config.get("fps", 20),
+                    "hedging": config.get("hedging", False),
+                    "hedge_percentile": config.get("hedgePercentile", 95),
+                    "request_timeout": config.get("requestTimeout", 50.0),
+                    "max_retries": config.get("maxRetries", 1),
+                    "mttf": config.get("mttf"),
+                    "mttr": config.get("mttr"),
+                    "warmup": config.get("warmup", "cold"),
+                    "warmup_k": config.get("warmupK", 5),
+                    "key_space": config.get("keySpace", 10),
+                    "key_skew": config.get("keySkew", 0.0),
+                    "l2_shards": config.get("l2Shards", 0),
+                    "l2_size": config.get("l2Size", 1000),
+                    "l2_policy": config.get("l2Policy", "non_inclusive"),
+                    "request_rate": config.get("requestRate"),
+                    "write_fraction": config.get("writeFraction", 0.0),
+                    "lb_policy": config.get("lbPolicy", "affinity"),
+                    "replicas": config.get("replicas", 2),
+                    "node_service_time": config.get("nodeServiceTime"),
+                    "node_service_dist": config.get("nodeServiceDist", "exponential"),
+                    "node_workers": config.get("nodeWorkers", 1),
+                    "node_queue_limit": config.get("nodeQueueLimit"),
+                    "db_service_time": config.get("dbServiceTime"),
+                    "db_service_dist": config.get("dbServiceDist", "exponential"),
+                    "db_workers": config.get("dbWorkers", 1),
+                    "db_queue_limit": config.get("dbQueueLimit")
                 }
                 asyncio.create_task(sim_manager.run_simulation(clean_config))
             elif command.get("type") == "STOP_SIM":
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+
+class PacingController:
+    """
+    Decides how much simulated time each chunk covers and how long to wait
+    between chunks, so the UI broadcast cadence no longer depends on how fast
+    the engine gets through events.
+
+    Modes:
+      - "max_speed": run chunks back-to-back, only yielding to the event loop;
+        broadcasts are throttled to `fps` per second
+      - "realtime": advance `speed` sim-time units per wall-clock second
+      - "fps": one chunk per UI frame at `fps` frames/sec, the engine using
+        at most `engine_share` of each frame
+
+    Chunk sizes adapt to the measured sim-time throughput so a chunk takes
+    about one frame of wall time however dense the event stream is.
+    """
+    MODES = ("max_speed", "realtime", "fps")
+    MIN_CHUNK = 0.1
+    MAX_GROWTH = 4.0  # Largest factor a chunk may grow by from one to the next
+    SMOOTHING = 0.3   # EWMA weight of the newest throughput sample
+
+    def __init__(self, mode="realtime", speed=400.0, fps=20, engine_share=0.8, initial_chunk=20.0):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown pacing mode '{mode}', expected one of {self.MODES}")
+        if speed <= 0 or fps <= 0:
+            raise ValueError("speed and fps must be positive")
+        self.mode = mode
+        self.speed = speed
+        self.frame_interval = 1.0 / fps
+        self.engine_share = engine_share
+        self.chunk = initial_chunk
+        self.sim_rate = None  # Sim-time units per wall second of engine work (EWMA)
+        self.events_per_sec = 0.0
+
+    def start(self, sim_time):
+        now = time.perf_counter()
+        self._start_wall = now
+        self._start_sim = sim_time
+        self._frame_start = now
+        self._last_frame = None
+
+    def next_chunk(self):
+        """Sim-time span to run before the next pacing decision."""
+        budget = self.frame_interval * (1.0 if self.mode == "max_speed" else self.engine_share)
+        target = self.sim_rate * budget if self.sim_rate else self.chunk
+        if self.mode == "realtime":
+            # Never run ahead of the wall clock by more than a frame
+            target = min(target, self.speed * self.frame_interval)
+        self.chunk = max(self.MIN_CHUNK, min(target, self.chunk * self.MAX_GROWTH))
+        return self.chunk
+
+    def record(self, sim_elapsed, events, wall_elapsed):
+        """Feed back how much sim time and how many events one chunk took."""
+        wall_elapsed = max(wall_elapsed, 1e-6)
+        rate = sim_elapsed / wall_elapsed
+        eps = events / wall_elapsed
+        if self.sim_rate is None:
+            self.sim_rate, self.events_per_sec = rate, eps
+        else:
+            a = self.SMOOTHING
+            self.sim_rate = a * rate + (1 - a) * self.sim_rate
+            self.events_per_sec = a * eps + (1 - a) * self.events_per_sec
+
+    def frame_due(self):
+        """Whether the UI should get an update after this chunk."""
+        if self.mode != "max_speed" or self._last_frame is None:
+            return True
+        return time.perf_counter() - self._last_frame >= self.frame_interval
+
+    def mark_frame(self):
+        self._last_frame = time.perf_counter()
+
+    async def wait(self, sim_time):
+        """Sleep until the next chunk is due; always yields to the event loop."""
+        now = time.perf_counter()
+        delay = 0.0
+        if self.mode == "realtime":
+            delay = self._start_wall + (sim_time - self._start_sim) / self.speed - now
+        elif self.mode == "fps":
+            # Next frame boundary; resync instead of bursting if we fell behind
+            self._frame_start = max(self._frame_start + self.frame_interval, now)
+            delay = self._frame_start - now
+        await asyncio.sleep(max(0.0, delay))
@@ -1,6 +1,6 @@
-import asyncio
 import json
 import random
+import time
 from typing import Dict, Any, List
 from engine.simulation import Simulation
 from agents.service_node import ServiceNode
@@ -11,8 +11,10 @@ from agents.load_balancer import LoadBalancerAgent
 from agents.client import Client
 from agents.database import Database
 from agents.network import NetworkAgent
+from agents.l2_cache import L2CacheAgent
+from agents.service_queue import ServiceQueue
 from cache.lru_cache import LRUCache
-from messages.message import Message
+from pacing import PacingController
 
 class SimulationManager:
     def __init__(self, websocket_manager):
@@ -24,17 +26,26 @@ class SimulationManager:
     async def run_simulation(self, config: Dict[str, Any]):
         try:
             self.running = True
-            self.sim = Simulation()
+            self.sim = Simulation(scheduler=config.get("scheduler", "heap"))
             
             # 1. Setup Observer for telemetry
             self.observer = ObserverAgent("observer", self.sim)
             
             # 2. Setup Core Infrastructure
             network = NetworkAgent(self.sim, latency_fn=lambda: random.uniform(1, 5))
-            db = Database("db1", self.sim, network)
+            db = Database("db1", self.sim, network, service=ServiceQueue.from_config(self.sim, config, "db"))
             # Seed DB with some initial data
-            for i in range(1, 11):
-                db.data[f"key_{i}"] = (f"value_{i}", 1)
+            key_space = config.get("key_space", 10)
+            db.seed(key_space)
+            
+            # Optional shared L2 tier between the cache nodes and the DB
+            l2_policy = config.get("l2_policy", "non_inclusive")
+            l2_shards = [
+                L2CacheAgent(f"l2_{i}", self.sim, LRUCache(capacity=config.get("l2_size", 1000)), network, db,
+                             policy=l2_policy, observer=self.observer)
+                for i in range(config.get("l2_shards", 0))
+            ]
+            db.l2_shards = l2_shards
             
             # 3. Setup Cache Nodes
             cache_nodes = []
@@ -42,43 +53,70 @@ class SimulationManager:
             for i in range(num_nodes):
                 node_id = f"node_{i}"
                 node_cache = LRUCache(capacity=config.get("cache_size", 100))
-                node = ServiceNode(node_id, self.sim, node_cache, network, db, observer=self.observer)
+                node = ServiceNode(node_id, self.sim, node_cache, network, db, observer=self.observer,
+                                   l2_shards=l2_shards, l2_policy=l2_policy,
+                                   service=ServiceQueue.from_config(self.sim, config, "node"))
                 cache_nodes.append(node)
             
             # Register service nodes with database for invalidation broadcasts
             db.service_nodes = cache_nodes
-            print(f"[Simulation] Initialized {num_nodes} cache nodes, database seeded with 10 keys")
+            for shard in l2_shards:
+                shard.service_nodes = cache_nodes  # Back-invalidation targets (inclusive L2)
+            for node in cache_nodes:
+                node.peers = cache_nodes  # Ring order matches the load balancer, for warm-up key ownership
+            print(f"[Simulation] Initialized {num_nodes} cache nodes, {len(l2_shards)} L2 shards ({l2_policy}), database seeded with {key_space} keys")
                 
             # 4. Setup Load Balancer (Topology Complexity)
-            lb = LoadBalancerAgent("lb1", self.sim, cache_nodes, network)
-            print(f"[Simulation] Load balancer initialized")
+            lb = LoadBalancerAgent(
+                "lb1", self.sim, cache_nodes, network, observer=self.observer,
+                hedging=config.get("hedging", False),
+                hedge_percentile=config.get("hedge_percentile", 95),
+                timeout=config.get("request_timeout", 50.0),
+                max_retries=config.get("max_retries", 1),
+                policy=config.get("lb_policy", "affinity"),
+                replicas=config.get("replicas", 2),
+            )
+            print(f"[Simulation] Load balancer initialized (policy={lb.policy}, hedging={lb.hedging})")
                 
             # 5. Setup Clients (Talk to LB instead of direct nodes)
             # Pass max_time to client so it stops generating events at end of simulation
             total_time = config.get("duration", 1000)
-            client = Client("client1", self.sim, network, [lb], max_time=total_time)
+            client = Client("client1", self.sim, network, [lb], max_time=total_time,
+                            key_space=key_space, skew=config.get("key_skew", 0.0),
+                            rate=config.get("request_rate"),
+                            db=db, write_fraction=config.get("write_fraction", 0.0))
             print(f"[Simulation] Client initialized, will generate read requests until time {total_time}")
             
             # 6. Setup Chaos Monkey for fault injection
+            chaos = None
             if config.get("chaos_enabled", True):
-                chaos = ChaosMonkeyAgent("chaos_monkey", self.sim, cache_nodes, kill_prob=0.1)
-                print(f"[Simulation] Chaos Monkey enabled")
+                chaos = ChaosMonkeyAgent(
+                    "chaos_monkey", self.sim, cache_nodes, kill_prob=0.1, network=network,
+                    mttf=config.get("mttf"), mttr=config.get("mttr"),
+                    warmup=config.get("warmup", "cold"), warmup_k=config.get("warmup_k", 5),
+                )
+                print(f"[Simulation] Chaos Monkey enabled (mttf={chaos.mttf}, mttr={chaos.mttr}, warmup={chaos.warmup})")
             
             # 7. Execution Loop with real-time streaming
-            chunk_size = 20
+            pacer = PacingController(
+                mode=config.get("pacing", "realtime"),
+                speed=config.get("speed", 400.0),
+                fps=config.get("fps", 20),
+            )
             
-            print(f"[Simulation] Starting execution loop (duration={total_time}, chunk_size={chunk_size})")
-            print(f"[Simulation] Initial event queue size: {len(self.sim.event_queue.queue)}")
+            print(f"[Simulation] Starting execution loop (duration={total_time}, pacing={pacer.mode})")
+            print(f"[Simulation] Initial event queue size: {len(self.sim.event_queue)}")
             
             # DEBUG: Print first few events
-            if self.sim.event_queue.queue:
-                print(f"[Simulation] Next event scheduled at time: {self.sim.event_queue.queue[0].time:.2f}")
+            if not self.sim.event_queue.empty():
+                print(f"[Simulation] Next event scheduled at time: {self.sim.event_queue.peek().time:.2f}")
             
             # Process simulation in chunks until we reach total_time or are stopped
             target_end_time = self.sim.time + total_time
             last_broadcast_time = -1  # Changed to -1 to ensure first broadcast
             iteration_count = 0
             last_log_count = 0  # Track how many logs we've already sent
+            pacer.start(self.sim.time)
             
             while self.sim.time < target_end_time:
                 if not self.running:
@@ -87,67 +125,90 @@ class SimulationManager:
                 
                 iteration_count += 1
                 
-                # Calculate next chunk end time
-                next_chunk_time = min(self.sim.time + chunk_size, target_end_time)
+                # Calculate next chunk end time (sized by the pacer from measured throughput)
+                next_chunk_time = min(self.sim.time + pacer.next_chunk(), target_end_time)
+                chunk_start_time = self.sim.time
+                wall_start = time.perf_counter()
                 
                 # Run simulation until next chunk time
+                events = 0
                 try:
-                    await self.sim.run(until_time=next_chunk_time)
+                    events = await self.sim.run(until_time=next_chunk_time)
                 except Exception as e:
                     print(f"[Simulation] ERROR in sim.run: {e}")
                     import traceback
                     traceback.print_exc()
+                pacer.record(self.sim.time - chunk_start_time, events, time.perf_counter() - wall_start)
                 
-                # Broadcast state/metrics to UI with progress every iteration
+                # Broadcast state/metrics to UI once per frame
                 progress = min(100, (self.sim.time / target_end_time) * 100)
                 hits = self.observer.metrics.get("hits", 0)
                 misses = self.observer.metrics.get("misses", 0)
                 
-                status = {
-                    "type": "SIM_UPDATE",
-                    "time": self.sim.time,
-                    "progress": progress,
-                    "metrics": self.observer.metrics,
-                    "agent_states": {node.agent_id: getattr(node, "active", True) for node in cache_nodes}
-                }
+                if pacer.frame_due() or self.sim.time >= target_end_time:
+                    self.observer.metrics["load_balancer"] = lb.report(window=True)
+                    self.observer.metrics["db_reads"] = db.reads
+                    self.observer.metrics["client"] = dict(client.stats)
+                    self.observer.metrics["tiers"] = self.tier_metrics(l2_shards)
+                    self.observer.metrics["queues"] = self.queue_metrics(cache_nodes, db)
+                    status = {
+                        "type": "SIM_UPDATE",
+                        "time": self.sim.time,
+                        "progress": progress,
+                        "metrics": self.observer.metrics,
+                        "agent_states": {node.agent_id: getattr(node, "active", True) for node in cache_nodes},
+                        "events_per_sec": round(pacer.events_per_sec)
+                    }
                 
-                try:
-                    await self.websocket_manager.broadcast(json.dumps(status))
-                    if iteration_count <= 3 or iteration_count % 10 == 0:
-                        print(f"[Simulation] Broadcast #{iteration_count}: time={self.sim.time:.1f}, progress={progress:.1f}%")
+                    try:
+                        await self.websocket_manager.broadcast(json.dumps(status))
+                        if iteration_count <= 3 or iteration_count % 10 == 0:
+                            print(f"[Simulation] Broadcast #{iteration_count}: time={self.sim.time:.1f}, progress={progress:.1f}%")
                     
-                    # Broadcast individual LOG messages for the frontend log panel
-                    recent_logs = self.observer.metrics.get("recent_logs", [])
-                    new_logs = recent_logs[:len(recent_logs) - last_log_count] if len(recent_logs) > last_log_count else []
-                    for log in reversed(new_logs[:10]):  # Send up to 10 new logs, oldest first
-                        details = log.get("details", {})
-                        log_msg = {
-                            "type": "LOG",
-                            "time": log["time"],
-                            "log_type": log["type"],
-                            "msg": f"{details.get('key', 'N/A')} on {details.get('node', 'N/A')}"
-                        }
-                        await self.websocket_manager.broadcast(json.dumps(log_msg))
-                    last_log_count = len(recent_logs)
+                        # Broadcast individual LOG messages for the frontend log panel
+                        recent_logs = self.observer.metrics.get("recent_logs", [])
+                        new_logs = recent_logs[:len(recent_logs) - last_log_count] if len(recent_logs) > last_log_count else []
+                        for log in reversed(new_logs[:10]):  # Send up to 10 new logs, oldest first
+                            details = log.get("details", {})
+                            log_msg = {
+                                "type": "LOG",
+                                "time": log["time"],
+                                "log_type": log["type"],
+                                "msg": f"{details.get('key', 'N/A')} on {details.get('node', details.get('shard', 'N/A'))}"
+                            }
+                            await self.websocket_manager.broadcast(json.dumps(log_msg))
+                        last_log_count = len(recent_logs)
                     
-                except Exception as e:
-                    print(f"[Simulation] ERROR broadcasting: {e}")
-                
-                last_broadcast_time = self.sim.time
+                    except Exception as e:
+                        print(f"[Simulation] ERROR broadcasting: {e}")
+                    
+                    pacer.mark_frame()
+                    last_broadcast_time = self.sim.time
                 
                 # Log progress
                 if int(self.sim.time) % 100 == 0 or hits + misses > 0:
                     ratio = (hits / (hits + misses) * 100) if (hits + misses) > 0 else 0
-                    queue_size = len(self.sim.event_queue.queue)
+                    queue_size = len(self.sim.event_queue)
                     print(f"[Simulation] Time={self.sim.time:.1f}/{target_end_time:.1f} ({progress:.1f}%), Hits={hits}, Misses={misses}, Ratio={ratio:.1f}%, Queue={queue_size}")
                 
                 # If we've reached the end, break
                 if self.sim.time >= target_end_time:
                     break
                 
-                # Small delay to prevent tight loop when queue is empty
-                await asyncio.sleep(0.05)
+                # Wait for the next chunk per the pacing mode (always yields to the event loop)
+                await pacer.wait(self.sim.time)
+
+            # Cancel timers that would otherwise outlive the run
+            client.stop()
+            if chaos:
+                chaos.stop()
+            print(f"[Simulation] Pending events after shutdown: {len(self.sim.event_queue)}")
 
+            self.observer.metrics["load_balancer"] = lb.report()
+            self.observer.metrics["db_reads"] = db.reads
+            self.observer.metrics["client"] = dict(client.stats)
+            self.observer.metrics["tiers"] = self.tier_metrics(l2_shards)
+            self.observer.metrics["queues"] = self.queue_metrics(cache_nodes, db)
             self.running = False
             final_hits = self.observer.metrics.get("hits", 0)
             final_misses = self.observer.metrics.get("misses", 0)
@@ -164,5 +225,14 @@ class SimulationManager:
             traceback.print_exc()
             self.running = False
 
+    def queue_metrics(self, cache_nodes, db):
+        agents = cache_nodes + [db]
+        return {agent.agent_id: agent.service.report() for agent in agents if agent.service}
+
+    def tier_metrics(self, l2_shards):
+        tiers = self.observer.tier_summary()
+        tiers["l2_shards"] = {shard.agent_id: dict(shard.stats) for shard in l2_shards}
+        return tiers
+
     def stop(self):
         self.running = False